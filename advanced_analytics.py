@@ -1,19 +1,129 @@
 import pandas as pd
 import numpy as np
-import plotly.express as px
-import plotly.graph_objects as go
-from datetime import datetime, timedelta
+from datetime import date, datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 import openai
 import os
 import json
+import time
+import hashlib
+import copy
+import tempfile
+import threading
+from types import MappingProxyType
+from dataclasses import dataclass
 import yfinance as yf
-from stock_service import fetch_stock_data
+from pydantic import BaseModel, ConfigDict
 
-# Initialize OpenAI client
+# Initialize OpenAI client, keeping connections alive so repeat calls skip the TLS handshake
+import httpx
 from openai import OpenAI
-client = OpenAI(api_key=os.environ.get("OPENAI_API_KEY"))
+client = OpenAI(
+    api_key=os.environ.get("OPENAI_API_KEY"),
+    http_client=httpx.Client(
+        limits=httpx.Limits(max_keepalive_connections=20, max_connections=40),
+        timeout=httpx.Timeout(60.0, connect=10.0)
+    )
+)
 
-def predict_portfolio_performance(portfolio, risk_profile, time_horizon_years=5):
+class PortfolioInsights(BaseModel):
+    """Structured response expected from the AI portfolio insights prompt."""
+    model_config = ConfigDict(extra="forbid", frozen=True)
+
+    assessment: str
+    recommendations: list[str]
+    long_term_insight: str
+    key_risk: str
+
+# Structured-output format so the API only returns JSON matching PortfolioInsights
+_INSIGHTS_RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": "portfolio_insights",
+        "strict": True,
+        "schema": PortfolioInsights.model_json_schema()
+    }
+}
+
+# Parsed AI insights by prompt hash, so an unchanged portfolio doesn't hit the API again
+_AI_INSIGHTS_CACHE = {}
+_AI_INSIGHTS_CACHE_SIZE = 128
+_ai_insights_cache_lock = threading.Lock()
+
+def _to_frame(portfolio):
+    """
+    Convert the portfolio list of dicts into a columnar DataFrame.
+    
+    Args:
+        portfolio (list): User's portfolio
+        
+    Returns:
+        pd.DataFrame: One row per holding, always with name/category/amount/ticker columns
+    """
+    frame = pd.DataFrame(portfolio)
+    for column in ("name", "category", "amount", "ticker"):
+        if column not in frame:
+            frame[column] = None
+    return frame
+
+def _summarize_portfolio(portfolio):
+    """
+    Total a portfolio and group its amounts by category.
+    
+    Args:
+        portfolio (list): User's portfolio
+        
+    Returns:
+        tuple: (total_value, dict of amount by category)
+    """
+    frame = _to_frame(portfolio)
+    category_amounts = frame.groupby('category', sort=False)['amount'].sum()
+    return float(frame['amount'].sum()), category_amounts.to_dict()
+
+def _is_valid_total(total_value):
+    """Check that a portfolio total is a positive, finite number we can divide by."""
+    return bool(np.isfinite(total_value)) and total_value > 0
+
+def _get_ticker_weights(portfolio):
+    """
+    Get each ticker's share of the portfolio's ticker-backed holdings.
+    
+    Args:
+        portfolio (list): User's portfolio
+        
+    Returns:
+        dict: Weight by ticker symbol, empty if no holding has a ticker
+    """
+    frame = _to_frame(portfolio)
+    has_ticker = frame['ticker'].notna() & (frame['ticker'] != '')
+    ticker_amounts = frame[has_ticker].groupby('ticker', sort=False)['amount'].sum()
+    total_value = ticker_amounts.sum()
+    if not _is_valid_total(total_value):
+        return {}
+    return (ticker_amounts / total_value).to_dict()
+
+def _project_values(total_value, annual_returns, num_periods, periods_per_year=1):
+    """
+    Project compounded portfolio values for several annual return rates at once.
+    
+    Args:
+        total_value (float): Current portfolio value
+        annual_returns (np.ndarray): Annual return rate for each projection path
+        num_periods (int): Number of evenly spaced periods to project after today
+        periods_per_year (int): Periods per year, e.g. 12 for monthly points
+        
+    Returns:
+        np.ndarray: Values with shape (len(annual_returns), num_periods + 1), starting at total_value
+    """
+    # P * (1 + r)^t, built by compounding one per-period growth factor with cumprod
+    # instead of calling pow for every (rate, time) pair
+    period_growth = np.power(1 + annual_returns, 1 / periods_per_year)
+    growth_factors = np.ones((len(annual_returns), num_periods + 1))
+    growth_factors[:, 1:] = period_growth[:, None]
+    return total_value * np.cumprod(growth_factors, axis=1)
+
+def predict_portfolio_performance(portfolio, risk_profile, time_horizon_years=5, portfolio_summary=None):
     """
     Predict the future performance of a portfolio over a specified time horizon.
     
@@ -21,10 +131,40 @@ def predict_portfolio_performance(portfolio, risk_profile, time_horizon_years=5)
         portfolio (list): User's current portfolio
         risk_profile (str): User's risk profile
         time_horizon_years (int): Years to predict into the future
+        portfolio_summary (tuple, optional): Precomputed result of _summarize_portfolio(portfolio)
         
     Returns:
         dict: Performance predictions and charts
     """
+    # Calculate current portfolio value and breakdown by category
+    total_value, portfolio_categories = portfolio_summary or _summarize_portfolio(portfolio)
+    
+    # The projection only depends on the summary, so identical inputs reuse the cached
+    # result. Callers get their own copy so they can't modify the cached one
+    result = _predict_from_summary(
+        total_value,
+        tuple(portfolio_categories.items()),
+        risk_profile,
+        time_horizon_years,
+        date.today()
+    )
+    return copy.deepcopy(result)
+
+@lru_cache(maxsize=128)
+def _predict_from_summary(total_value, category_items, risk_profile, time_horizon_years, as_of):
+    """
+    Compute the performance prediction for a summarized portfolio.
+    
+    Args:
+        total_value (float): Current portfolio value
+        category_items (tuple): (category, amount) pairs
+        risk_profile (str): User's risk profile
+        time_horizon_years (int): Years to predict into the future
+        as_of (date): Day the projection starts, which also keys the cache
+        
+    Returns:
+        dict: Performance predictions and charts (shared between calls, do not modify)
+    """
     # Initialize result
     result = {
         "predictions": [],
@@ -33,38 +173,28 @@ def predict_portfolio_performance(portfolio, risk_profile, time_horizon_years=5)
         "risk_assessment": {},
         "summary": ""
     }
+    portfolio_categories = dict(category_items)
     
-    # Calculate current portfolio value
-    total_value = sum(item['amount'] for item in portfolio)
+    if not _is_valid_total(total_value):
+        result["error"] = "Portfolio total value must be positive."
+        return result
     
     # Get expected return rates by category and risk profile
     expected_returns = get_expected_return_rates(risk_profile)
-    result["expected_returns"] = expected_returns
-    
-    # Calculate weighted expected return for the portfolio
-    portfolio_categories = {}
-    for item in portfolio:
-        category = item['category']
-        if category in portfolio_categories:
-            portfolio_categories[category] += item['amount']
-        else:
-            portfolio_categories[category] = item['amount']
-    
-    weighted_return = 0
-    for category, amount in portfolio_categories.items():
-        category_weight = amount / total_value
-        if category in expected_returns:
-            weighted_return += category_weight * expected_returns[category]
+    result["expected_returns"] = dict(expected_returns)
     
     # Get risk volatility estimates
     volatility_estimates = get_volatility_estimates(risk_profile)
-    result["risk_assessment"] = volatility_estimates
+    result["risk_assessment"] = dict(volatility_estimates)
     
-    # Generate projection data
-    dates = []
-    pessimistic_values = []
-    expected_values = []
-    optimistic_values = []
+    # Category weights aligned with their expected returns and volatilities
+    categories = list(portfolio_categories)
+    category_weights = np.array([portfolio_categories[c] for c in categories], dtype=float) / total_value
+    category_returns = np.array([expected_returns.get(c, 0.0) for c in categories])
+    category_volatilities = np.array([volatility_estimates.get(c, 0.0) for c in categories])
+    
+    # Calculate weighted expected return for the portfolio
+    weighted_return = float(category_weights @ category_returns)
     
     # Base assumptions:
     # - Pessimistic: -1 standard deviation from expected return
@@ -72,46 +202,32 @@ def predict_portfolio_performance(portfolio, risk_profile, time_horizon_years=5)
     # - Optimistic: +1 standard deviation from expected return
     
     # Calculate standard deviation for the portfolio
-    portfolio_volatility = 0
-    for category, amount in portfolio_categories.items():
-        category_weight = amount / total_value
-        if category in volatility_estimates:
-            portfolio_volatility += category_weight * volatility_estimates[category]
+    portfolio_volatility = float(category_weights @ category_volatilities)
     
     # Generate monthly projections
-    current_date = datetime.now()
-    for month in range(time_horizon_years * 12 + 1):
-        projection_date = current_date + timedelta(days=30 * month)
-        dates.append(projection_date)
-        
-        # Monthly return rates
-        monthly_expected_return = weighted_return / 12
-        monthly_volatility = portfolio_volatility / np.sqrt(12)
-        
-        # Calculate values
-        time_factor = month / 12  # Convert to years
-        
-        # Expected value formula: P * (1 + r)^t where r is annual return rate and t is time in years
-        expected_value = total_value * (1 + weighted_return) ** time_factor
-        expected_values.append(expected_value)
-        
-        # Pessimistic scenario: 1 standard deviation below expected return
-        pessimistic_return = weighted_return - portfolio_volatility
-        pessimistic_value = total_value * (1 + pessimistic_return) ** time_factor
-        pessimistic_values.append(max(0, pessimistic_value))  # Ensure no negative values
-        
-        # Optimistic scenario: 1 standard deviation above expected return
-        optimistic_return = weighted_return + portfolio_volatility
-        optimistic_value = total_value * (1 + optimistic_return) ** time_factor
-        optimistic_values.append(optimistic_value)
-    
-    # Create dataframe for chart
-    chart_data = pd.DataFrame({
-        'Date': dates,
-        'Pessimistic': pessimistic_values,
-        'Expected': expected_values,
-        'Optimistic': optimistic_values
-    })
+    num_months = time_horizon_years * 12
+    dates = pd.date_range(pd.Timestamp(as_of), periods=num_months + 1, freq=pd.DateOffset(months=1))
+
+    # Annual return rates for the pessimistic, expected and optimistic scenarios
+    scenario_returns = np.array([
+        weighted_return - portfolio_volatility,
+        weighted_return,
+        weighted_return + portfolio_volatility
+    ])
+
+    # Value formula: P * (1 + r)^t where r is annual return rate and t is time in years
+    projected_values = _project_values(total_value, scenario_returns, num_months, periods_per_year=12)
+    pessimistic_values = np.maximum(projected_values[0], 0)  # Ensure no negative values
+    expected_values = projected_values[1]
+    optimistic_values = projected_values[2]
+
+    # Create dataframe for chart. The values are only plotted, so store them as float32
+    # in one column-major block; predictions and summary below keep full precision
+    chart_values = np.asfortranarray(
+        np.stack([pessimistic_values, expected_values, optimistic_values], axis=1).astype(np.float32)
+    )
+    chart_data = pd.DataFrame(chart_values, columns=['Pessimistic', 'Expected', 'Optimistic'])
+    chart_data.insert(0, 'Date', dates)
     
     result["chart_data"] = chart_data
     
@@ -122,9 +238,9 @@ def predict_portfolio_performance(portfolio, risk_profile, time_horizon_years=5)
             index = year * 12  # Convert years to months
             predictions.append({
                 "year": year,
-                "pessimistic": pessimistic_values[index],
-                "expected": expected_values[index],
-                "optimistic": optimistic_values[index]
+                "pessimistic": float(pessimistic_values[index]),
+                "expected": float(expected_values[index]),
+                "optimistic": float(optimistic_values[index])
             })
     
     result["predictions"] = predictions
@@ -146,6 +262,55 @@ def predict_portfolio_performance(portfolio, risk_profile, time_horizon_years=5)
     
     return result
 
+# Expected annual return rates by category for each risk profile.
+# These are simplified estimates - real models would be more complex
+_LOW_RISK_RETURNS = MappingProxyType({
+    "Large Cap": 0.06,  # 6%
+    "Mid Cap": 0.08,    # 8%
+    "Small Cap": 0.10,  # 10%
+    "Gold": 0.04,       # 4%
+    "ETFs/Crypto": 0.07 # 7%
+})
+_MEDIUM_RISK_RETURNS = MappingProxyType({
+    "Large Cap": 0.08,  # 8%
+    "Mid Cap": 0.10,    # 10%
+    "Small Cap": 0.13,  # 13%
+    "Gold": 0.04,       # 4%
+    "ETFs/Crypto": 0.12 # 12%
+})
+_HIGH_RISK_RETURNS = MappingProxyType({
+    "Large Cap": 0.09,  # 9%
+    "Mid Cap": 0.12,    # 12%
+    "Small Cap": 0.15,  # 15%
+    "Gold": 0.04,       # 4%
+    "ETFs/Crypto": 0.18 # 18%
+})
+
+# Volatility estimates by category for each risk profile.
+# These are simplified estimates - real models would use historical data
+_LOW_RISK_VOLATILITY = MappingProxyType({
+    "Large Cap": 0.10,  # 10%
+    "Mid Cap": 0.14,    # 14%
+    "Small Cap": 0.18,  # 18%
+    "Gold": 0.12,       # 12%
+    "ETFs/Crypto": 0.20 # 20%
+})
+_MEDIUM_RISK_VOLATILITY = MappingProxyType({
+    "Large Cap": 0.12,  # 12%
+    "Mid Cap": 0.16,    # 16%
+    "Small Cap": 0.20,  # 20%
+    "Gold": 0.12,       # 12%
+    "ETFs/Crypto": 0.25 # 25%
+})
+_HIGH_RISK_VOLATILITY = MappingProxyType({
+    "Large Cap": 0.15,  # 15%
+    "Mid Cap": 0.20,    # 20%
+    "Small Cap": 0.25,  # 25%
+    "Gold": 0.12,       # 12%
+    "ETFs/Crypto": 0.35 # 35%
+})
+
+@lru_cache(maxsize=8)
 def get_expected_return_rates(risk_profile):
     """
     Get expected annual return rates by category based on risk profile.
@@ -154,34 +319,16 @@ def get_expected_return_rates(risk_profile):
         risk_profile (str): Risk profile (Low, Medium, or High Risk)
         
     Returns:
-        dict: Expected return rates by category
+        Mapping: Read-only expected return rates by category
     """
-    # These are simplified estimates - real models would be more complex
     if "Low Risk" in risk_profile:
-        return {
-            "Large Cap": 0.06,  # 6%
-            "Mid Cap": 0.08,    # 8%
-            "Small Cap": 0.10,  # 10%
-            "Gold": 0.04,       # 4%
-            "ETFs/Crypto": 0.07 # 7%
-        }
+        return _LOW_RISK_RETURNS
     elif "Medium Risk" in risk_profile:
-        return {
-            "Large Cap": 0.08,  # 8%
-            "Mid Cap": 0.10,    # 10%
-            "Small Cap": 0.13,  # 13%
-            "Gold": 0.04,       # 4%
-            "ETFs/Crypto": 0.12 # 12%
-        }
+        return _MEDIUM_RISK_RETURNS
     else:  # High Risk
-        return {
-            "Large Cap": 0.09,  # 9%
-            "Mid Cap": 0.12,    # 12%
-            "Small Cap": 0.15,  # 15%
-            "Gold": 0.04,       # 4%
-            "ETFs/Crypto": 0.18 # 18%
-        }
+        return _HIGH_RISK_RETURNS
 
+@lru_cache(maxsize=8)
 def get_volatility_estimates(risk_profile):
     """
     Get volatility estimates by category based on risk profile.
@@ -190,40 +337,109 @@ def get_volatility_estimates(risk_profile):
         risk_profile (str): Risk profile (Low, Medium, or High Risk)
         
     Returns:
-        dict: Volatility estimates by category
+        Mapping: Read-only volatility estimates by category
     """
-    # These are simplified estimates - real models would use historical data
     if "Low Risk" in risk_profile:
-        return {
-            "Large Cap": 0.10,  # 10%
-            "Mid Cap": 0.14,    # 14%
-            "Small Cap": 0.18,  # 18%
-            "Gold": 0.12,       # 12%
-            "ETFs/Crypto": 0.20 # 20%
-        }
+        return _LOW_RISK_VOLATILITY
     elif "Medium Risk" in risk_profile:
-        return {
-            "Large Cap": 0.12,  # 12%
-            "Mid Cap": 0.16,    # 16%
-            "Small Cap": 0.20,  # 20%
-            "Gold": 0.12,       # 12%
-            "ETFs/Crypto": 0.25 # 25%
-        }
+        return _MEDIUM_RISK_VOLATILITY
     else:  # High Risk
-        return {
-            "Large Cap": 0.15,  # 15%
-            "Mid Cap": 0.20,    # 20%
-            "Small Cap": 0.25,  # 25%
-            "Gold": 0.12,       # 12%
-            "ETFs/Crypto": 0.35 # 35%
-        }
+        return _HIGH_RISK_VOLATILITY
+
+# S&P 500 sector weights used as the benchmark (approximate values)
+_SP500_SECTOR_WEIGHTS = pd.Series({
+    "Information Technology": 0.28,
+    "Health Care": 0.14,
+    "Financials": 0.11,
+    "Consumer Discretionary": 0.10,
+    "Communication Services": 0.09,
+    "Industrials": 0.08,
+    "Consumer Staples": 0.06,
+    "Energy": 0.05,
+    "Utilities": 0.03,
+    "Real Estate": 0.03,
+    "Materials": 0.03
+})
+
+# Sector by ticker, persisted to disk since sectors rarely change
+_SECTOR_CACHE_PATH = os.path.join(".cache", "sectors.json")
+_SECTOR_CACHE_TTL = timedelta(days=7).total_seconds()
+_sector_cache = None
+# Streamlit sessions run on separate threads, so the sector cache and its file are shared
+_sector_cache_lock = threading.Lock()
+
+def _load_sector_cache():
+    """Load the on-disk sector cache once, starting empty if it is missing or unreadable. Call with the lock held."""
+    global _sector_cache
+    if _sector_cache is None:
+        try:
+            with open(_SECTOR_CACHE_PATH) as f:
+                _sector_cache = json.load(f)
+        except (OSError, ValueError):
+            _sector_cache = {}
+    return _sector_cache
+
+def _save_sector_cache():
+    """Write a snapshot of the sector cache to disk, ignoring failures since it is only a cache. Call with the lock held."""
+    snapshot = dict(_sector_cache)
+    try:
+        cache_dir = os.path.dirname(_SECTOR_CACHE_PATH)
+        os.makedirs(cache_dir, exist_ok=True)
+        with tempfile.NamedTemporaryFile("w", dir=cache_dir, suffix=".tmp", delete=False) as f:
+            json.dump(snapshot, f)
+        os.replace(f.name, _SECTOR_CACHE_PATH)
+    except OSError:
+        pass
+
+def _lookup_sector(batch, ticker):
+    """Get a ticker's sector from a yf.Tickers batch, or None if the lookup fails."""
+    try:
+        return batch.tickers[ticker.upper()].info.get('sector') or "Unknown"
+    except Exception:
+        return None
+
+def _get_sectors(tickers):
+    """
+    Get the sector for each ticker, fetching uncached ones concurrently.
+    
+    Args:
+        tickers (list): Ticker symbols
+        
+    Returns:
+        dict: Sector by ticker, "Unknown" where the lookup failed
+    """
+    now = time.time()
+    with _sector_cache_lock:
+        sectors = _load_sector_cache()
+        missing = [
+            ticker for ticker in tickers
+            if ticker not in sectors or now - sectors[ticker]["fetched_at"] > _SECTOR_CACHE_TTL
+        ]
+    
+    if missing:
+        # One yf.Tickers batch shares a single session across all the lookups. The lock
+        # isn't held here so other sessions aren't blocked on the network
+        batch = yf.Tickers(missing)
+        with ThreadPoolExecutor(max_workers=min(16, len(missing))) as executor:
+            fetched = list(executor.map(lambda ticker: _lookup_sector(batch, ticker), missing))
+        
+        # Failed lookups aren't cached so they are retried next time (keeping any stale entry)
+        with _sector_cache_lock:
+            for ticker, sector in zip(missing, fetched):
+                if sector is not None:
+                    sectors[ticker] = {"sector": sector, "fetched_at": now}
+            _save_sector_cache()
+    
+    with _sector_cache_lock:
+        return {ticker: sectors[ticker]["sector"] if ticker in sectors else "Unknown" for ticker in tickers}
 
-def analyze_sector_exposure(portfolio):
+def analyze_sector_exposure(portfolio, include_charts=True):
     """
     Analyze the sector exposure of a portfolio using ticker symbols.
     
     Args:
         portfolio (list): User's portfolio with ticker symbols
+        include_charts (bool): Whether to build the Plotly figures (chart_data is always included)
         
     Returns:
         dict: Sector exposure analysis
@@ -237,102 +453,62 @@ def analyze_sector_exposure(portfolio):
         "chart_data": None
     }
     
-    # Get tickers from portfolio
-    tickers = []
-    ticker_weights = {}
-    total_value = sum(item['amount'] for item in portfolio if 'ticker' in item)
+    # Get tickers and their portfolio weights
+    ticker_weights = _get_ticker_weights(portfolio)
     
-    if total_value == 0:
-        result["error"] = "No ticker symbols found in portfolio for sector analysis."
+    if not ticker_weights:
+        result["error"] = "No ticker symbols with a positive value found in portfolio for sector analysis."
         return result
     
-    for item in portfolio:
-        if 'ticker' in item and item['ticker']:
-            ticker = item['ticker']
-            tickers.append(ticker)
-            ticker_weights[ticker] = item['amount'] / total_value
-    
-    if not tickers:
-        result["error"] = "No ticker symbols found in portfolio for sector analysis."
-        return result
-    
-    # Fetch stock data
-    try:
-        stock_data = fetch_stock_data(tickers)
-    except Exception as e:
-        result["error"] = f"Error fetching stock data: {str(e)}"
-        return result
+    tickers = list(ticker_weights)
     
     # Get sector information using yfinance
-    sectors = {}
-    sector_weights = {}
-    sector_tickers = {}
-    
-    for ticker in tickers:
-        try:
-            ticker_obj = yf.Ticker(ticker)
-            ticker_info = ticker_obj.info
-            if 'sector' in ticker_info and ticker_info['sector']:
-                sector = ticker_info['sector']
-                if sector not in sectors:
-                    sectors[sector] = 0
-                    sector_tickers[sector] = []
-                
-                sectors[sector] += ticker_weights.get(ticker, 0)
-                sector_tickers[sector].append(ticker)
-            else:
-                if "Unknown" not in sectors:
-                    sectors["Unknown"] = 0
-                    sector_tickers["Unknown"] = []
-                sectors["Unknown"] += ticker_weights.get(ticker, 0)
-                sector_tickers["Unknown"].append(ticker)
-        except Exception:
-            if "Unknown" not in sectors:
-                sectors["Unknown"] = 0
-                sector_tickers["Unknown"] = []
-            sectors["Unknown"] += ticker_weights.get(ticker, 0)
-            sector_tickers["Unknown"].append(ticker)
-    
+    ticker_sectors = _get_sectors(tickers)
+
+    # Total the ticker weights per sector with one bincount over integer sector codes
+    sector_codes, sector_names = pd.factorize(pd.Series([ticker_sectors[ticker] for ticker in tickers]))
+    weights = np.array([ticker_weights[ticker] for ticker in tickers])
+    sector_totals = np.bincount(sector_codes, weights=weights, minlength=len(sector_names))
+
+    sector_tickers = {sector: [] for sector in sector_names}
+    for ticker, code in zip(tickers, sector_codes):
+        sector_tickers[sector_names[code]].append(ticker)
+
     # Normalize sector weights to ensure they sum to 1
-    total_weight = sum(sectors.values())
-    for sector in sectors:
-        sector_weights[sector] = sectors[sector] / total_weight if total_weight > 0 else 0
+    total_weight = sector_totals.sum()
+    if total_weight > 0:
+        sector_totals = sector_totals / total_weight
+    else:
+        sector_totals = np.zeros_like(sector_totals)
+    sector_weights = dict(zip(sector_names, sector_totals.tolist()))
     
     result["sector_allocation"] = sector_weights
     result["sector_tickers"] = sector_tickers
     
     # Calculate diversification score (Herfindahl-Hirschman Index)
     # Lower HHI is better (more diversified)
-    hhi = sum(weight**2 for weight in sector_weights.values())
+    sector_series = pd.Series(sector_weights, dtype=float)
+    sector_weight_values = sector_series.to_numpy()
+    hhi = float(sector_weight_values @ sector_weight_values)
     
     # Convert to a diversification score (0-100, higher is better)
     diversification_score = max(0, min(100, 100 * (1 - hhi)))
     result["diversification_score"] = round(diversification_score, 1)
     
-    # Get S&P 500 sector weights as a benchmark (approximate values)
-    sp500_sectors = {
-        "Information Technology": 0.28,
-        "Health Care": 0.14,
-        "Financials": 0.11,
-        "Consumer Discretionary": 0.10,
-        "Communication Services": 0.09,
-        "Industrials": 0.08,
-        "Consumer Staples": 0.06,
-        "Energy": 0.05,
-        "Utilities": 0.03,
-        "Real Estate": 0.03,
-        "Materials": 0.03
-    }
+    # Convert to percentages for better readability, aligning the benchmark to our sectors
+    benchmark_weights = _SP500_SECTOR_WEIGHTS
+    sector_percents = sector_series * 100
+    benchmark_percents = benchmark_weights.reindex(sector_series.index, fill_value=0) * 100
     
     # Create a sector chart
-    if sector_weights:
-        # Convert to percentage for better readability
-        sector_percents = {sector: weight * 100 for sector, weight in sector_weights.items()}
+    if include_charts and sector_weights:
+        # Plotly is slow to import, so it's only loaded when a chart is actually built
+        import plotly.express as px
         
         # Create chart data
         fig = px.pie(
-            names=list(sector_percents.keys()),
-            values=list(sector_percents.values()),
+            names=sector_percents.index,
+            values=sector_percents.values,
             title="Portfolio Sector Allocation",
             hole=0.4,
         )
@@ -344,13 +520,9 @@ def analyze_sector_exposure(portfolio):
         # Add benchmark comparison if available
         if len(sector_weights) > 1:
             # Create bar chart for comparison with benchmark
-            sectors = list(sector_weights.keys())
-            portfolio_values = [sector_weights[s] * 100 for s in sectors]
-            benchmark_values = [sp500_sectors.get(s, 0) * 100 for s in sectors]
-            
             comp_fig = px.bar(
-                x=sectors,
-                y=[portfolio_values, benchmark_values],
+                x=sector_percents.index,
+                y=[sector_percents.values, benchmark_percents.values],
                 barmode='group',
                 labels={"value": "Allocation (%)", "variable": "Source"},
                 title="Portfolio vs. Benchmark Sector Allocation",
@@ -376,16 +548,18 @@ def analyze_sector_exposure(portfolio):
     # Generate recommendations based on sector exposure
     recommendations = []
     
-    # Compare portfolio sector allocation to benchmark
-    for sector, benchmark_weight in sp500_sectors.items():
-        portfolio_weight = sector_weights.get(sector, 0)
-        difference = portfolio_weight - benchmark_weight
-        
-        if abs(difference) > 0.05:  # If more than 5% difference
-            if difference > 0:
-                recommendations.append(f"Your portfolio is overweight in {sector} ({portfolio_weight*100:.1f}% vs {benchmark_weight*100:.1f}% benchmark).")
-            else:
-                recommendations.append(f"Your portfolio is underweight in {sector} ({portfolio_weight*100:.1f}% vs {benchmark_weight*100:.1f}% benchmark).")
+    # Compare portfolio sector allocation to benchmark, keeping sectors more than 5% off
+    aligned_weights = sector_series.reindex(benchmark_weights.index, fill_value=0)
+    differences = aligned_weights - benchmark_weights
+    significant = differences[differences.abs() > 0.05]
+    
+    for sector, difference in significant.items():
+        portfolio_weight = aligned_weights[sector]
+        benchmark_weight = benchmark_weights[sector]
+        if difference > 0:
+            recommendations.append(f"Your portfolio is overweight in {sector} ({portfolio_weight*100:.1f}% vs {benchmark_weight*100:.1f}% benchmark).")
+        else:
+            recommendations.append(f"Your portfolio is underweight in {sector} ({portfolio_weight*100:.1f}% vs {benchmark_weight*100:.1f}% benchmark).")
     
     # Add diversification recommendation if needed
     if diversification_score < 60:
@@ -395,9 +569,9 @@ def analyze_sector_exposure(portfolio):
     
     # Create chart data
     chart_data = pd.DataFrame({
-        'Sector': list(sector_weights.keys()),
-        'Portfolio Weight': [weight * 100 for weight in sector_weights.values()],
-        'S&P 500 Weight': [sp500_sectors.get(sector, 0) * 100 for sector in sector_weights.keys()]
+        'Sector': sector_percents.index,
+        'Portfolio Weight': sector_percents.values,
+        'S&P 500 Weight': benchmark_percents.values
     })
     
     result["chart_data"] = chart_data
@@ -477,13 +651,64 @@ def analyze_sector_exposure(portfolio):
     
     return result
 
-def generate_economic_scenario_analysis(portfolio, time_horizon_years=5):
+# Economic scenarios with their category returns and likelihood
+_ECONOMIC_SCENARIOS = MappingProxyType({
+    "Base Case": MappingProxyType({
+        "description": "Moderate growth, inflation around 2-3%, gradual interest rate changes.",
+        "large_cap_return": 0.08,
+        "mid_cap_return": 0.10,
+        "small_cap_return": 0.12,
+        "gold_return": 0.03,
+        "crypto_return": 0.10,
+        "probability": 0.50  # 50% probability
+    }),
+    "High Inflation": MappingProxyType({
+        "description": "Elevated inflation (4-6%), aggressive interest rate hikes, pressure on growth stocks.",
+        "large_cap_return": 0.06,
+        "mid_cap_return": 0.07,
+        "small_cap_return": 0.08,
+        "gold_return": 0.10,
+        "crypto_return": 0.05,
+        "probability": 0.20  # 20% probability
+    }),
+    "Recession": MappingProxyType({
+        "description": "Economic contraction, declining corporate profits, higher volatility.",
+        "large_cap_return": -0.05,
+        "mid_cap_return": -0.10,
+        "small_cap_return": -0.15,
+        "gold_return": 0.08,
+        "crypto_return": -0.20,
+        "probability": 0.15  # 15% probability
+    }),
+    "Bull Market": MappingProxyType({
+        "description": "Strong economic growth, low unemployment, favorable corporate conditions.",
+        "large_cap_return": 0.12,
+        "mid_cap_return": 0.15,
+        "small_cap_return": 0.20,
+        "gold_return": 0.01,
+        "crypto_return": 0.25,
+        "probability": 0.15  # 15% probability
+    })
+})
+
+# Scenario return key for each of our portfolio categories
+_SCENARIO_RETURN_KEYS = MappingProxyType({
+    "Large Cap": "large_cap_return",
+    "Mid Cap": "mid_cap_return",
+    "Small Cap": "small_cap_return",
+    "Gold": "gold_return",
+    "ETFs/Crypto": "crypto_return"
+})
+
+def generate_economic_scenario_analysis(portfolio, time_horizon_years=5, portfolio_summary=None, include_charts=True):
     """
     Generate an economic scenario analysis for a portfolio.
     
     Args:
         portfolio (list): User's portfolio
         time_horizon_years (int): Years to analyze
+        portfolio_summary (tuple, optional): Precomputed result of _summarize_portfolio(portfolio)
+        include_charts (bool): Whether to build the Plotly figure (chart_data is always included)
         
     Returns:
         dict: Economic scenario analysis
@@ -496,49 +721,9 @@ def generate_economic_scenario_analysis(portfolio, time_horizon_years=5):
     }
     
     try:
-        # Define economic scenarios
-        scenario_config = {
-            "Base Case": {
-                "description": "Moderate growth, inflation around 2-3%, gradual interest rate changes.",
-                "large_cap_return": 0.08,
-                "mid_cap_return": 0.10,
-                "small_cap_return": 0.12,
-                "gold_return": 0.03,
-                "crypto_return": 0.10,
-                "probability": 0.50  # 50% probability
-            },
-            "High Inflation": {
-                "description": "Elevated inflation (4-6%), aggressive interest rate hikes, pressure on growth stocks.",
-                "large_cap_return": 0.06,
-                "mid_cap_return": 0.07,
-                "small_cap_return": 0.08,
-                "gold_return": 0.10,
-                "crypto_return": 0.05,
-                "probability": 0.20  # 20% probability
-            },
-            "Recession": {
-                "description": "Economic contraction, declining corporate profits, higher volatility.",
-                "large_cap_return": -0.05,
-                "mid_cap_return": -0.10,
-                "small_cap_return": -0.15,
-                "gold_return": 0.08,
-                "crypto_return": -0.20,
-                "probability": 0.15  # 15% probability
-            },
-            "Bull Market": {
-                "description": "Strong economic growth, low unemployment, favorable corporate conditions.",
-                "large_cap_return": 0.12,
-                "mid_cap_return": 0.15,
-                "small_cap_return": 0.20,
-                "gold_return": 0.01,
-                "crypto_return": 0.25,
-                "probability": 0.15  # 15% probability
-            }
-        }
-        
         # Format scenarios for the UI
         scenarios = []
-        for name, config in scenario_config.items():
+        for name, config in _ECONOMIC_SCENARIOS.items():
             scenarios.append({
                 "name": name,
                 "description": config["description"],
@@ -553,49 +738,33 @@ def generate_economic_scenario_analysis(portfolio, time_horizon_years=5):
         
         result["scenarios"] = scenarios
         
-        # Calculate current portfolio value
-        total_value = sum(item['amount'] for item in portfolio)
-        
-        # Create portfolio breakdown by category
-        portfolio_categories = {}
-        for item in portfolio:
-            category = item['category']
-            if category in portfolio_categories:
-                portfolio_categories[category] += item['amount']
-            else:
-                portfolio_categories[category] = item['amount']
-        
-        # Map our categories to scenario categories
-        category_mapping = {
-            "Large Cap": "large_cap_return",
-            "Mid Cap": "mid_cap_return",
-            "Small Cap": "small_cap_return",
-            "Gold": "gold_return",
-            "ETFs/Crypto": "crypto_return"
-        }
-        
-        # Calculate expected returns under each scenario
+        # Calculate current portfolio value and breakdown by category
+        total_value, portfolio_categories = portfolio_summary or _summarize_portfolio(portfolio)
+        
+        if not _is_valid_total(total_value):
+            raise ValueError("Portfolio total value must be positive.")
+        
+        # Build a (scenarios x categories) return matrix aligned with the category weights
+        scenario_names = list(_ECONOMIC_SCENARIOS)
+        categories = list(portfolio_categories)
+        category_weights = np.array([portfolio_categories[c] for c in categories], dtype=float) / total_value
+        return_keys = [_SCENARIO_RETURN_KEYS.get(c, "large_cap_return") for c in categories]  # Default to large cap if category not found
+        scenario_returns = np.array(
+            [[_ECONOMIC_SCENARIOS[name][key] for key in return_keys] for name in scenario_names],
+            dtype=float
+        ).reshape(len(scenario_names), len(categories))
+
+        # Calculate weighted return and projected final value for every scenario at once
+        weighted_returns = scenario_returns @ category_weights
+        final_values = total_value * (1 + weighted_returns) ** time_horizon_years
+
         scenario_results = {}
-        for scenario in scenarios:
-            scenario_name = scenario["name"]
-            scenario_config_data = scenario_config[scenario_name]
-            
-            # Calculate weighted return for this scenario
-            weighted_return = 0
-            for category, amount in portfolio_categories.items():
-                category_weight = amount / total_value
-                return_key = category_mapping.get(category, "large_cap_return")  # Default to large cap if category not found
-                weighted_return += category_weight * scenario_config_data[return_key]
-            
-            # Project final value after time horizon
-            final_value = total_value * (1 + weighted_return) ** time_horizon_years
-            
-            # Add to results
-            scenario_results[scenario_name] = {
-                "description": scenario_config_data["description"],
-                "annual_return": weighted_return,
-                "final_value": final_value,
-                "probability": scenario_config_data["probability"]
+        for name, weighted_return, final_value in zip(scenario_names, weighted_returns, final_values):
+            scenario_results[name] = {
+                "description": _ECONOMIC_SCENARIOS[name]["description"],
+                "annual_return": float(weighted_return),
+                "final_value": float(final_value),
+                "probability": _ECONOMIC_SCENARIOS[name]["probability"]
             }
         
         # Calculate expected value across all scenarios (probability-weighted average)
@@ -604,23 +773,17 @@ def generate_economic_scenario_analysis(portfolio, time_horizon_years=5):
             for scenario_data in scenario_results.values()
         )
         
-        # Create chart data for visualization
-        chart_data = []
-        for year in range(time_horizon_years + 1):
-            year_data = {"Year": year}
-            
-            for scenario_name, scenario_result in scenario_results.items():
-                annual_return = scenario_result["annual_return"]
-                year_data[scenario_name] = total_value * (1 + annual_return) ** year
-            
-            chart_data.append(year_data)
-        
-        # Create DataFrame for chart data
-        chart_df = pd.DataFrame(chart_data)
+        # Create chart data for visualization: one row per year, one column per scenario
+        years = np.arange(time_horizon_years + 1)
+        projections = _project_values(total_value, weighted_returns, time_horizon_years)
+        chart_df = pd.DataFrame(projections.T, columns=scenario_names)
+        chart_df.insert(0, "Year", years)
         
         # Create a line chart for scenario visualization
         try:
-            if len(chart_df) > 0:
+            if include_charts and len(chart_df) > 0:
+                import plotly.express as px
+                
                 fig = px.line(chart_df, x="Year", y=chart_df.columns[1:], 
                             title="Portfolio Value Projection by Economic Scenario",
                             labels={"value": "Portfolio Value ($)", "variable": "Economic Scenario"})
@@ -676,44 +839,50 @@ def generate_economic_scenario_analysis(portfolio, time_horizon_years=5):
             "recommendations": ["Try again with a revised portfolio."]
         }
 
-def get_ai_portfolio_insights(portfolio, risk_profile):
+def get_ai_portfolio_insights(portfolio, risk_profile, portfolio_summary=None, on_chunk=None):
     """
     Get AI-generated insights about a portfolio using OpenAI's GPT models.
     
     Args:
         portfolio (list): User's portfolio
         risk_profile (str): User's risk profile
+        portfolio_summary (tuple, optional): Precomputed result of _summarize_portfolio(portfolio)
+        on_chunk (callable, optional): Called with each piece of the response text as it streams in
         
     Returns:
         dict: AI-generated insights
     """
+    # Calculate current portfolio value and breakdown by category
+    total_value, portfolio_categories = portfolio_summary or _summarize_portfolio(portfolio)
+    
+    # Skip the API call entirely for a portfolio we can't describe
+    if not _is_valid_total(total_value):
+        return {
+            "summary": "Error generating AI insights: Portfolio total value must be positive.",
+            "detailed_analysis": {
+                "Error Details": "AI insights need a portfolio with a positive total value."
+            },
+            "opportunities": ["Add holdings with positive amounts to your portfolio."],
+            "risks": ["Analysis not available due to an error."]
+        }
+    
     # Format portfolio data for the prompt
-    portfolio_text = "Portfolio:\n"
-    total_value = sum(item['amount'] for item in portfolio)
-    
-    for item in portfolio:
-        percentage = (item['amount'] / total_value) * 100
-        portfolio_text += f"- {item['name']} ({item['category']}): ${item['amount']:,.2f} ({percentage:.1f}%)\n"
-    
-    # Create portfolio breakdown by category
-    portfolio_categories = {}
-    for item in portfolio:
-        category = item['category']
-        if category in portfolio_categories:
-            portfolio_categories[category] += item['amount']
-        else:
-            portfolio_categories[category] = item['amount']
+    portfolio_text = "Portfolio:\n" + "".join(
+        f"- {item['name']} ({item['category']}): ${item['amount']:,.2f} ({item['amount'] / total_value * 100:.1f}%)\n"
+        for item in portfolio
+    )
     
-    category_breakdown = "Category Breakdown:\n"
-    for category, amount in portfolio_categories.items():
-        percentage = (amount / total_value) * 100
-        category_breakdown += f"- {category}: ${amount:,.2f} ({percentage:.1f}%)\n"
+    category_breakdown = "Category Breakdown:\n" + "".join(
+        f"- {category}: ${amount:,.2f} ({amount / total_value * 100:.1f}%)\n"
+        for category, amount in portfolio_categories.items()
+    )
     
     # Get expected returns based on risk profile
     expected_returns = get_expected_return_rates(risk_profile)
-    returns_text = "Expected Returns by Category:\n"
-    for category, rate in expected_returns.items():
-        returns_text += f"- {category}: {rate*100:.1f}%\n"
+    returns_text = "Expected Returns by Category:\n" + "".join(
+        f"- {category}: {rate*100:.1f}%\n"
+        for category, rate in expected_returns.items()
+    )
     
     # Create the prompt for OpenAI
     prompt = f"""
@@ -738,33 +907,55 @@ def get_ai_portfolio_insights(portfolio, risk_profile):
     Each recommendation should be a separate string in the recommendations array.
     """
     
+    # Reuse the insights from an identical earlier request
+    cache_key = hashlib.sha256(prompt.encode()).hexdigest()
+    with _ai_insights_cache_lock:
+        parsed = _AI_INSIGHTS_CACHE.get(cache_key)
+    
     try:
-        # Call OpenAI API
-        response = client.chat.completions.create(
-            model="gpt-4o",  # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
-            messages=[
-                {"role": "system", "content": "You are a sophisticated financial advisor specializing in portfolio analysis."},
-                {"role": "user", "content": prompt}
-            ],
-            response_format={"type": "json_object"}
-        )
-        
-        # Parse the response
-        raw_insights = json.loads(response.choices[0].message.content)
+        if parsed is None:
+            # Call OpenAI API, streaming so callers can show the response as it arrives
+            stream = client.chat.completions.create(
+                model="gpt-4o",  # the newest OpenAI model is "gpt-4o" which was released May 13, 2024.
+                messages=[
+                    {"role": "system", "content": "You are a sophisticated financial advisor specializing in portfolio analysis."},
+                    {"role": "user", "content": prompt}
+                ],
+                response_format=_INSIGHTS_RESPONSE_FORMAT,
+                stream=True
+            )
+            
+            content_parts = []
+            for chunk in stream:
+                if not chunk.choices:
+                    continue
+                content = chunk.choices[0].delta.content
+                if content:
+                    content_parts.append(content)
+                    if on_chunk:
+                        on_chunk(content)
+            
+            # Parse and validate the response in one step and remember it,
+            # dropping the oldest entry when full
+            parsed = PortfolioInsights.model_validate_json("".join(content_parts))
+            with _ai_insights_cache_lock:
+                if cache_key not in _AI_INSIGHTS_CACHE and len(_AI_INSIGHTS_CACHE) >= _AI_INSIGHTS_CACHE_SIZE:
+                    _AI_INSIGHTS_CACHE.pop(next(iter(_AI_INSIGHTS_CACHE)))
+                _AI_INSIGHTS_CACHE[cache_key] = parsed
         
         # Format insights for UI display
         insights = {
-            "summary": f"Portfolio Assessment: {raw_insights.get('assessment', 'No assessment available.')}",
+            "summary": f"Portfolio Assessment: {parsed.assessment}",
             "detailed_analysis": {
-                "Strategic Assessment": raw_insights.get('assessment', 'No assessment available.'),
-                "Long-term Outlook": raw_insights.get('long_term_insight', 'No long-term insights available.'),
-                "Key Risk Factors": raw_insights.get('key_risk', 'No risk analysis available.')
+                "Strategic Assessment": parsed.assessment,
+                "Long-term Outlook": parsed.long_term_insight,
+                "Key Risk Factors": parsed.key_risk
             },
             "opportunities": [
-                f"Opportunity: {rec}" for rec in raw_insights.get('recommendations', ['No recommendations available.'])
+                f"Opportunity: {rec}" for rec in parsed.recommendations or ['No recommendations available.']
             ],
             "risks": [
-                f"Risk: {raw_insights.get('key_risk', 'No key risk identified.')}"
+                f"Risk: {parsed.key_risk}"
             ]
         }
         
@@ -782,16 +973,131 @@ def get_ai_portfolio_insights(portfolio, risk_profile):
             "risks": ["Analysis not available due to an error."]
         }
 
-def calculate_modern_portfolio_theory_metrics(portfolio, lookback_days=365):
+# Annualization constants for the MPT metrics
+_TRADING_DAYS = 252
+_SQRT_TRADING_DAYS = np.sqrt(_TRADING_DAYS)
+
+# Risk-free rate (using 3-month Treasury yield as approximation - simplified)
+_RISK_FREE_RATE = 0.04  # 4% annual rate
+
+# Random generator for the efficient frontier portfolios
+_rng = np.random.default_rng()
+
+@dataclass(slots=True)
+class RiskMetrics:
+    """Per-stock MPT metrics, held as arrays aligned with tickers (beta and alpha are None when not market-relative)."""
+    tickers: list
+    annualized_return: np.ndarray
+    annualized_volatility: np.ndarray
+    beta: np.ndarray | None
+    alpha: np.ndarray | None
+
+    def to_dict(self):
+        """
+        Convert to the per-ticker dict layout.
+        
+        Returns:
+            dict: Metrics by ticker, e.g. {"AAPL": {"beta": 1.1, ...}}. Beta and alpha
+                are None for every ticker when they weren't computed
+        """
+        market_relative = self.beta is not None and self.alpha is not None
+        return {
+            ticker: {
+                "annualized_return": float(self.annualized_return[i]),
+                "annualized_volatility": float(self.annualized_volatility[i]),
+                "beta": float(self.beta[i]) if market_relative else None,
+                "alpha": float(self.alpha[i]) if market_relative else None
+            }
+            for i, ticker in enumerate(self.tickers)
+        }
+
+# Downloaded price history, persisted to disk so re-analysis survives restarts. Files are
+# keyed by date range, so any older than a couple of days can no longer be hit
+_PRICE_CACHE_DIR = os.path.join(".cache", "prices")
+_PRICE_CACHE_TTL = timedelta(days=2).total_seconds()
+
+def _price_cache_path(tickers, start, end):
+    """Get the on-disk cache file for a ticker set and date range."""
+    key = hashlib.sha256(f"{','.join(tickers)}|{start.isoformat()}|{end.isoformat()}".encode()).hexdigest()
+    return os.path.join(_PRICE_CACHE_DIR, f"{key}.pkl")
+
+def _prune_price_cache():
+    """Delete cached price files past their TTL, ignoring failures since it is only a cache."""
+    cutoff = time.time() - _PRICE_CACHE_TTL
+    try:
+        with os.scandir(_PRICE_CACHE_DIR) as entries:
+            for entry in entries:
+                if entry.name.endswith(".pkl") and entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+    except OSError:
+        pass
+
+class _NoPriceData(Exception):
+    """Raised when a price download comes back empty, so lru_cache doesn't memoize the failure."""
+
+def _download_close_prices(tickers, start, end):
+    """
+    Download adjusted daily closing prices for a set of tickers.
+    
+    Args:
+        tickers (tuple): Sorted ticker symbols
+        start (date): First day of history
+        end (date): Last day of history
+        
+    Returns:
+        pd.DataFrame: Adjusted close by ticker, empty if the download failed
+    """
+    try:
+        # Copy so callers can't modify the memoized frame
+        return _load_close_prices(tickers, start, end).copy()
+    except _NoPriceData:
+        return pd.DataFrame()
+
+@lru_cache(maxsize=32)
+def _load_close_prices(tickers, start, end):
+    """Load closing prices from the disk cache or yfinance, raising _NoPriceData if none came back."""
+    cache_path = _price_cache_path(tickers, start, end)
+    try:
+        return pd.read_pickle(cache_path)
+    except Exception:
+        pass  # Missing or unreadable cache file, download instead
+    
+    # Only the adjusted close is used, so skip the other fields and fetch in parallel.
+    # yfinance's end is exclusive, so ask for the day after to include the last day's bar
+    prices = yf.download(list(tickers), start=start, end=end + timedelta(days=1), auto_adjust=True,
+                         threads=True, progress=False)['Close']
+    if isinstance(prices, pd.Series):
+        # Older yfinance returns a single ticker as a Series
+        prices = prices.to_frame(tickers[0])
+    
+    # Failed (empty) downloads are neither persisted nor memoized, so they are retried
+    if prices.empty:
+        raise _NoPriceData(tickers)
+    try:
+        os.makedirs(_PRICE_CACHE_DIR, exist_ok=True)
+        _prune_price_cache()
+        prices.to_pickle(cache_path)
+    except OSError:
+        pass
+    
+    return prices
+
+def calculate_modern_portfolio_theory_metrics(portfolio, lookback_days=365, compute_market_relative=True,
+                                              return_chart=False, seed=None):
     """
     Calculate Modern Portfolio Theory metrics for a portfolio.
     
     Args:
         portfolio (list): User's portfolio with ticker symbols
         lookback_days (int): Days of historical data to use
+        compute_market_relative (bool): Whether to fetch the S&P 500 and compute beta, alpha,
+            R-squared and the Treynor ratio. When False these are None
+        return_chart (bool): Whether to build the Plotly performance chart
+        seed (int, optional): Seed for the efficient frontier portfolios, for reproducible results
         
     Returns:
-        dict: MPT metrics including Sharpe ratio, beta, alpha, etc.
+        dict: MPT metrics including Sharpe ratio, beta, alpha, etc. Per-stock metrics
+            are under "risk_metrics" as a RiskMetrics
     """
     # Initialize result
     result = {
@@ -800,112 +1106,110 @@ def calculate_modern_portfolio_theory_metrics(portfolio, lookback_days=365):
         "alpha": None,
         "r_squared": None,
         "treynor_ratio": None,
-        "risk_metrics": {},
+        "risk_metrics": None,
         "correlation_matrix": None,
         "efficient_frontier": None
     }
     
-    # Get tickers from portfolio
-    tickers = []
-    ticker_weights = {}
-    total_value = sum(item['amount'] for item in portfolio if 'ticker' in item)
-    
-    if total_value == 0:
-        result["error"] = "No ticker symbols found in portfolio for MPT analysis."
-        return result
-    
-    for item in portfolio:
-        if 'ticker' in item and item['ticker']:
-            ticker = item['ticker']
-            tickers.append(ticker)
-            ticker_weights[ticker] = item['amount'] / total_value
+    # Get tickers and their portfolio weights
+    ticker_weights = _get_ticker_weights(portfolio)
     
-    if not tickers:
-        result["error"] = "No ticker symbols found in portfolio for MPT analysis."
+    if not ticker_weights:
+        result["error"] = "No ticker symbols with a positive value found in portfolio for MPT analysis."
         return result
     
-    # Add market index for beta calculation
-    tickers.append("^GSPC")  # S&P 500
+    tickers = list(ticker_weights)
     
     # Get historical price data
     end_date = datetime.now()
     start_date = end_date - timedelta(days=lookback_days)
     
     try:
-        # Download historical data
-        price_data = yf.download(tickers, start=start_date, end=end_date)['Adj Close']
-        
-        # Calculate daily returns
-        daily_returns = price_data.pct_change().dropna()
-        
-        # Extract market (S&P 500) returns
-        market_returns = daily_returns['^GSPC']
-        stock_returns = daily_returns.drop('^GSPC', axis=1)
-        
-        # Risk-free rate (using 3-month Treasury yield as approximation - simplified)
-        risk_free_rate = 0.04  # 4% annual rate
-        daily_risk_free = (1 + risk_free_rate) ** (1/252) - 1  # Convert to daily
-        
-        # Calculate annualized return and volatility for each stock
-        stock_risk_metrics = {}
-        for ticker in stock_returns.columns:
-            returns = stock_returns[ticker]
-            annualized_return = (1 + returns.mean()) ** 252 - 1
-            annualized_volatility = returns.std() * np.sqrt(252)
-            
-            # Calculate beta for this stock
-            covariance = returns.cov(market_returns)
-            market_variance = market_returns.var()
-            beta = covariance / market_variance
-            
-            # Calculate alpha
-            expected_return = risk_free_rate + beta * (market_returns.mean() * 252 - risk_free_rate)
-            alpha = annualized_return - expected_return
-            
-            stock_risk_metrics[ticker] = {
-                "annualized_return": annualized_return,
-                "annualized_volatility": annualized_volatility,
-                "beta": beta,
-                "alpha": alpha
-            }
-        
-        result["risk_metrics"] = stock_risk_metrics
-        
-        # Calculate portfolio metrics
-        portfolio_daily_return = 0
-        portfolio_beta = 0
-        portfolio_alpha = 0
-        
-        for ticker, weight in ticker_weights.items():
-            if ticker in stock_risk_metrics:
-                portfolio_daily_return += stock_returns[ticker].mean() * weight
-                portfolio_beta += stock_risk_metrics[ticker]["beta"] * weight
-                portfolio_alpha += stock_risk_metrics[ticker]["alpha"] * weight
-        
+        # Download historical data (cached per ticker set and day). The S&P 500 is fetched
+        # on its own so every portfolio shares one cached copy for the beta calculation
+        stock_prices = _download_close_prices(tuple(sorted(tickers)), start_date.date(), end_date.date())
+        price_data = stock_prices[tickers]
+        if compute_market_relative:
+            market_prices = _download_close_prices(("^GSPC",), start_date.date(), end_date.date())
+            price_data = price_data.join(market_prices["^GSPC"], how="inner")
+        
+        # Calculate daily returns on the price array, dropping days with a missing price.
+        # The market, if fetched, is the last column. The returns matrix is held as float32
+        # to halve the memory traffic of the passes over it; its small reductions are float64
+        prices = price_data.to_numpy(dtype=np.float64)
+        joint_returns = (prices[1:] / prices[:-1] - 1).astype(np.float32)
+        valid_days = ~np.isnan(joint_returns).any(axis=1)
+        joint_returns = joint_returns[valid_days]
+        return_dates = price_data.index[1:][valid_days]
+        
+        # One covariance pass over the joint stock and market returns gives every variance,
+        # each stock's covariance with the market and the correlation matrix
+        joint_means = joint_returns.mean(axis=0, dtype=np.float64)
+        joint_deviations = joint_returns - joint_means.astype(np.float32)
+        joint_cov = (joint_deviations.T @ joint_deviations).astype(np.float64) / (len(joint_returns) - 1)
+        joint_std = np.sqrt(np.diag(joint_cov))
+
+        num_stocks = len(tickers)
+        stock_means = joint_means[:num_stocks]
+        cov_matrix = joint_cov[:num_stocks, :num_stocks]
+
+        # Calculate annualized return, volatility, beta and alpha for all stocks at once
+        annualized_returns = (1 + stock_means) ** _TRADING_DAYS - 1
+        annualized_volatilities = joint_std[:num_stocks] * _SQRT_TRADING_DAYS
+
+        betas = alphas = None
+        if compute_market_relative:
+            market_mean = joint_means[-1]
+            market_variance = joint_cov[-1, -1]
+
+            # Beta: covariance of each stock with the market over the market variance
+            covariances = joint_cov[:num_stocks, -1]
+            betas = covariances / market_variance
+
+            # Alpha: excess over the CAPM expected return
+            expected_returns = _RISK_FREE_RATE + betas * (market_mean * _TRADING_DAYS - _RISK_FREE_RATE)
+            alphas = annualized_returns - expected_returns
+
+        result["risk_metrics"] = RiskMetrics(
+            tickers=tickers,
+            annualized_return=annualized_returns,
+            annualized_volatility=annualized_volatilities,
+            beta=betas,
+            alpha=alphas
+        )
+
+        # Calculate portfolio metrics as weighted sums over the stocks
+        weights = np.array([ticker_weights.get(ticker, 0) for ticker in tickers])
+        portfolio_daily_return = float(weights @ stock_means)
+
         # Annualized portfolio return and volatility
-        portfolio_return = (1 + portfolio_daily_return) ** 252 - 1
-        
+        portfolio_return = (1 + portfolio_daily_return) ** _TRADING_DAYS - 1
+
         # Calculate portfolio volatility (using covariance matrix)
-        weights = np.array([ticker_weights.get(ticker, 0) for ticker in stock_returns.columns])
-        cov_matrix = stock_returns.cov()
-        portfolio_variance = np.dot(weights.T, np.dot(cov_matrix, weights)) * 252
+        portfolio_variance = weights @ cov_matrix @ weights * _TRADING_DAYS
         portfolio_volatility = np.sqrt(portfolio_variance)
         
         # Calculate Sharpe Ratio
-        sharpe_ratio = (portfolio_return - risk_free_rate) / portfolio_volatility
-        
-        # Calculate Treynor Ratio (return per unit of systematic risk)
-        treynor_ratio = (portfolio_return - risk_free_rate) / portfolio_beta if portfolio_beta != 0 else None
+        sharpe_ratio = (portfolio_return - _RISK_FREE_RATE) / portfolio_volatility
         
-        # Calculate R-squared (using approximation)
-        portfolio_returns = stock_returns.dot(weights)
-        correlation = portfolio_returns.corr(market_returns)
-        r_squared = correlation ** 2
+        portfolio_beta = portfolio_alpha = treynor_ratio = r_squared = None
+        if compute_market_relative:
+            portfolio_beta = float(weights @ betas)
+            portfolio_alpha = float(weights @ alphas)
+            
+            # Calculate Treynor Ratio (return per unit of systematic risk)
+            treynor_ratio = (portfolio_return - _RISK_FREE_RATE) / portfolio_beta if portfolio_beta != 0 else None
+            
+            # Calculate R-squared from the portfolio's covariance with the market
+            portfolio_market_cov = float(weights @ covariances) * _TRADING_DAYS
+            market_volatility = np.sqrt(market_variance * _TRADING_DAYS)
+            correlation = portfolio_market_cov / (portfolio_volatility * market_volatility)
+            r_squared = correlation ** 2
         
         # Store results
         result["sharpe_ratio"] = sharpe_ratio
         result["beta"] = portfolio_beta
-        result["alpha"] = portfolio_alpha * 100  # Convert to percentage
+        result["alpha"] = portfolio_alpha * 100 if compute_market_relative else None  # Convert to percentage
         result["r_squared"] = r_squared
         result["treynor_ratio"] = treynor_ratio
         result["portfolio_return"] = portfolio_return
@@ -915,43 +1219,46 @@ def calculate_modern_portfolio_theory_metrics(portfolio, lookback_days=365):
         result["key_metrics"] = {
             "sharpe_ratio": sharpe_ratio,
             "beta": portfolio_beta,
-            "alpha": portfolio_alpha * 100,  # Convert to percentage for display
+            "alpha": portfolio_alpha * 100 if compute_market_relative else None,  # Convert to percentage for display
             "r_squared": r_squared,
             "std_dev": portfolio_volatility * 100,  # Convert to percentage
             "max_drawdown": 12.5,  # Placeholder - would need historical calculation
             "sharpe_ratio_context": "+0.3" if sharpe_ratio > 1.0 else "-0.2",
-            "beta_context": "Defensive" if portfolio_beta < 1.0 else "Aggressive",
-            "alpha_context": "+2.1%" if portfolio_alpha > 0 else "-1.8%",
+            "beta_context": ("Defensive" if portfolio_beta < 1.0 else "Aggressive") if compute_market_relative else None,
+            "alpha_context": ("+2.1%" if portfolio_alpha > 0 else "-1.8%") if compute_market_relative else None,
             "std_dev_context": "Lower than benchmark" if portfolio_volatility < 0.15 else "Higher than benchmark",
-            "r_squared_context": "Diversified" if r_squared < 0.7 else "Market dependent",
+            "r_squared_context": ("Diversified" if r_squared < 0.7 else "Market dependent") if compute_market_relative else None,
             "max_drawdown_context": "Moderate risk"
         }
         
-        # Create correlation matrix
-        result["correlation_matrix"] = daily_returns.corr()
+        # Create correlation matrix from the joint covariance
+        result["correlation_matrix"] = pd.DataFrame(
+            joint_cov / np.outer(joint_std, joint_std),
+            index=price_data.columns,
+            columns=price_data.columns
+        )
         
-        # Generate points for efficient frontier (simplified approach)
-        num_portfolios = 20
+        # Generate points for efficient frontier (simplified approach).
+        # A single stock has no other weightings, so only the current portfolio is plotted
         efficient_frontier = []
-        
-        # Random portfolio weights for efficient frontier
-        for _ in range(num_portfolios):
-            random_weights = np.random.random(len(tickers) - 1)  # Exclude S&P 500
-            random_weights /= np.sum(random_weights)
-            
-            # Calculate return and volatility for this random portfolio
-            port_return = 0
-            for i, ticker in enumerate(stock_returns.columns):
-                port_return += random_weights[i] * stock_returns[ticker].mean() * 252
-            
-            port_variance = np.dot(random_weights.T, np.dot(cov_matrix, random_weights)) * 252
-            port_volatility = np.sqrt(port_variance)
-            
-            efficient_frontier.append({
-                "return": port_return,
-                "volatility": port_volatility
-            })
-        
+        if len(tickers) > 1:
+            num_portfolios = 20
+
+            # Random portfolio weights for efficient frontier, one row per portfolio
+            rng = _rng if seed is None else np.random.default_rng(seed)
+            random_weights = rng.random((num_portfolios, len(stock_means)))
+            random_weights /= random_weights.sum(axis=1, keepdims=True)
+
+            # Calculate return and volatility for all random portfolios at once
+            port_returns = random_weights @ stock_means * _TRADING_DAYS
+            port_variances = np.einsum('ki,ij,kj->k', random_weights, cov_matrix, random_weights) * _TRADING_DAYS
+            port_volatilities = np.sqrt(port_variances)
+
+            efficient_frontier = [
+                {"return": float(port_return), "volatility": float(port_volatility)}
+                for port_return, port_volatility in zip(port_returns, port_volatilities)
+            ]
+
         # Add actual portfolio point
         efficient_frontier.append({
             "return": portfolio_return,
@@ -962,33 +1269,36 @@ def calculate_modern_portfolio_theory_metrics(portfolio, lookback_days=365):
         result["efficient_frontier"] = efficient_frontier
         
         # Create a performance chart comparing portfolio to S&P 500
-        # First, get cumulative returns
-        portfolio_cum_returns = (1 + portfolio_returns).cumprod()
-        market_cum_returns = (1 + market_returns).cumprod()
-        
-        # Create dataframe for plotting
-        performance_df = pd.DataFrame({
-            'Portfolio': portfolio_cum_returns,
-            'S&P 500': market_cum_returns
-        })
-        
-        # Create the performance chart
-        fig = px.line(
-            performance_df, 
-            title="Portfolio Performance vs. S&P 500",
-            labels={"value": "Growth of $1 Invested", "variable": ""}
-        )
-        fig.update_layout(legend_title_text="")
-        result["performance_chart"] = fig
+        if return_chart:
+            # First, get cumulative returns straight from the return arrays
+            portfolio_returns = joint_returns[:, :num_stocks] @ weights
+            performance_data = {'Portfolio': np.cumprod(1 + portfolio_returns)}
+            if compute_market_relative:
+                performance_data['S&P 500'] = np.cumprod(1 + joint_returns[:, -1])
+            
+            # Create dataframe for plotting
+            performance_df = pd.DataFrame(performance_data, index=return_dates)
+            
+            # Create the performance chart
+            import plotly.express as px
+            
+            fig = px.line(
+                performance_df, 
+                title="Portfolio Performance vs. S&P 500" if compute_market_relative else "Portfolio Performance",
+                labels={"value": "Growth of $1 Invested", "variable": ""}
+            )
+            fig.update_layout(legend_title_text="")
+            result["performance_chart"] = fig
         
-        # Create interpretation data
-        result["interpretation"] = {
+        # Create interpretation data, leaving out the market-relative metrics if they were skipped
+        interpretation = {
             "Sharpe Ratio": f"The Sharpe ratio of {sharpe_ratio:.2f} indicates how much excess return you receive for the extra volatility of holding a riskier asset. Higher is better, with values above 1.0 generally considered good.",
-            "Beta": f"Beta of {portfolio_beta:.2f} measures your portfolio's volatility compared to the market. A beta of 1 means your portfolio moves with the market, less than 1 means lower volatility than the market, and greater than 1 means higher volatility.",
-            "Alpha": f"Alpha of {portfolio_alpha*100:.2f}% represents the excess return compared to what would be predicted by beta alone. Positive alpha means the portfolio is outperforming expectations.",
+            "Beta": None if not compute_market_relative else f"Beta of {portfolio_beta:.2f} measures your portfolio's volatility compared to the market. A beta of 1 means your portfolio moves with the market, less than 1 means lower volatility than the market, and greater than 1 means higher volatility.",
+            "Alpha": None if not compute_market_relative else f"Alpha of {portfolio_alpha*100:.2f}% represents the excess return compared to what would be predicted by beta alone. Positive alpha means the portfolio is outperforming expectations.",
             "Standard Deviation": f"Standard deviation of {portfolio_volatility*100:.2f}% measures the total risk (volatility) of your portfolio. Lower values indicate less price fluctuation.",
-            "R-Squared": f"R-squared of {r_squared:.2f} indicates how much of your portfolio's movements can be explained by market movements. Values closer to 1 mean higher correlation with the market."
+            "R-Squared": None if not compute_market_relative else f"R-squared of {r_squared:.2f} indicates how much of your portfolio's movements can be explained by market movements. Values closer to 1 mean higher correlation with the market."
         }
+        result["interpretation"] = {key: text for key, text in interpretation.items() if text is not None}
         
         return result
         
@@ -1018,4 +1328,47 @@ def calculate_modern_portfolio_theory_metrics(portfolio, lookback_days=365):
             "Troubleshooting": "Please ensure your portfolio contains valid stock tickers. This analysis requires actual stock data to perform calculations."
         }
         
-        return result
\ No newline at end of file
+        return result
+
+def run_all_analytics(portfolio, risk_profile, time_horizon_years=5, analyses=None):
+    """
+    Run the independent portfolio analytics concurrently.
+    
+    The sector, MPT and AI analyses spend most of their time waiting on yfinance
+    and OpenAI, so running them side by side takes about as long as the slowest one.
+    
+    Args:
+        portfolio (list): User's portfolio
+        risk_profile (str): User's risk profile
+        time_horizon_years (int): Years to project for the prediction and scenarios
+        analyses (iterable, optional): Names of the analyses to run. Defaults to all of
+            "prediction", "sector_analysis", "scenario_analysis", "mpt_metrics" and "ai_insights"
+        
+    Returns:
+        dict: Result of each analysis by name
+    """
+    # Summarize once and share it between the analyses that need it
+    portfolio_summary = _summarize_portfolio(portfolio)
+    
+    tasks = {
+        "prediction": lambda: predict_portfolio_performance(
+            portfolio, risk_profile, time_horizon_years, portfolio_summary=portfolio_summary
+        ),
+        "sector_analysis": lambda: analyze_sector_exposure(portfolio),
+        "scenario_analysis": lambda: generate_economic_scenario_analysis(
+            portfolio, time_horizon_years, portfolio_summary=portfolio_summary
+        ),
+        "mpt_metrics": lambda: calculate_modern_portfolio_theory_metrics(portfolio, return_chart=True),
+        "ai_insights": lambda: get_ai_portfolio_insights(
+            portfolio, risk_profile, portfolio_summary=portfolio_summary
+        )
+    }
+    if analyses is not None:
+        tasks = {name: tasks[name] for name in analyses}
+    
+    if not tasks:
+        return {}
+    
+    with ThreadPoolExecutor(max_workers=len(tasks)) as executor:
+        futures = {name: executor.submit(task) for name, task in tasks.items()}
+        return {name: future.result() for name, future in futures.items()}
@@ -1,6 +1,10 @@
 import json
 import os
+import time
+import asyncio
+import hashlib
 import datetime
+import threading
 
 from openai import OpenAI
 
@@ -8,7 +12,159 @@ from openai import OpenAI
 OPENAI_API_KEY = os.environ.get("OPENAI_API_KEY")
 openai = OpenAI(api_key=OPENAI_API_KEY)
 
-def generate_investment_recommendations(portfolio, risk_profile, market="US", financial_goals=None):
+# Prompt templates, filled in with str.format for each request
+_RECOMMENDATIONS_PROMPT = """\
+As a financial advisor, analyze this investment portfolio and provide recommendations.
+
+PORTFOLIO DATA:
+{portfolio_summary}
+
+RISK PROFILE: {risk_profile}
+MARKET: {market}
+
+{goals_summary}
+
+Provide the following in JSON format:
+1. A brief assessment of the current portfolio
+2. Three specific investment recommendations with tickers
+3. Long-term strategy suggestions
+4. One area of concern or risk
+
+Response should be valid JSON with these keys: 
+"assessment", "specific_recommendations", "long_term_strategy", "risk_warning"
+"""
+
+_TAX_PROMPT = """\
+As a tax advisor specializing in investment tax optimization, analyze this portfolio 
+and provide tax-efficient recommendations.
+
+PORTFOLIO DATA:
+{portfolio_summary}
+
+COUNTRY: {country}
+CURRENT TAX YEAR: {current_year}
+
+Provide the following in JSON format:
+1. Tax-loss harvesting opportunities
+2. Tax-advantaged account recommendations
+3. Long-term vs short-term capital gains considerations
+4. Specific tax-efficient investment alternatives
+
+For India, consider STCG, LTCG rules, ELSS funds, and 80C deductions.
+For US, consider 401k, IRA, Roth considerations, wash sale rules, and qualified dividends.
+
+Response should be valid JSON with these keys:
+"tax_loss_harvesting", "tax_advantaged_accounts", "capital_gains_strategy", "tax_efficient_alternatives"
+"""
+
+_SWOT_PROMPT = """\
+As a portfolio analyst, perform a SWOT analysis on this investment portfolio.
+
+PORTFOLIO DATA:
+{portfolio_summary}
+
+RISK PROFILE: {risk_profile}
+
+Provide a SWOT analysis in JSON format with these keys:
+"strengths", "weaknesses", "opportunities", "threats"
+
+Each section should have 2-3 specific points relevant to this portfolio.
+"""
+
+_FULL_REPORT_PROMPT = """\
+As a financial advisor, tax advisor and portfolio analyst, analyze this investment portfolio.
+
+PORTFOLIO DATA:
+{portfolio_summary}
+
+RISK PROFILE: {risk_profile}
+MARKET AND TAX COUNTRY: {market}
+CURRENT TAX YEAR: {current_year}
+
+{goals_summary}
+
+Provide a JSON object with exactly these three keys:
+
+"recommendations": an object with the keys "assessment" (a brief assessment of the
+current portfolio), "specific_recommendations" (three specific investment
+recommendations with tickers), "long_term_strategy" and "risk_warning" (one area of
+concern or risk)
+
+"tax": an object with the keys "tax_loss_harvesting", "tax_advantaged_accounts",
+"capital_gains_strategy" and "tax_efficient_alternatives".
+For India, consider STCG, LTCG rules, ELSS funds, and 80C deductions.
+For US, consider 401k, IRA, Roth considerations, wash sale rules, and qualified dividends.
+
+"swot": an object with the keys "strengths", "weaknesses", "opportunities" and
+"threats", each with 2-3 specific points relevant to this portfolio
+"""
+
+# Response text by request hash, so an unchanged portfolio isn't re-requested (and re-billed)
+_RESPONSE_CACHE = {}
+_RESPONSE_CACHE_SIZE = 128
+_RESPONSE_CACHE_TTL = 24 * 60 * 60  # seconds
+_response_cache_lock = threading.Lock()
+
+# the newest OpenAI model is "gpt-4o" which was released May 13, 2024. do not change this unless explicitly requested by the user
+def _cached_json_chat(prompt, model="gpt-4o", temperature=0.7, on_chunk=None, validate=None):
+    """
+    Request a JSON chat completion, reusing the response to an identical earlier request.
+    
+    Args:
+        prompt (str): User prompt
+        model (str): OpenAI model name
+        temperature (float): Sampling temperature
+        on_chunk (callable, optional): Called with each piece of the response text as it streams in
+        validate (callable, optional): Check on the parsed response; responses failing it aren't cached
+        
+    Returns:
+        dict: Parsed JSON response
+        
+    Raises:
+        json.JSONDecodeError: If the response is not valid JSON (such responses aren't cached)
+        ValueError: If the response fails validate
+    """
+    key = hashlib.sha256(f"{model}|{temperature}|{prompt}".encode()).hexdigest()
+    now = time.time()
+    
+    with _response_cache_lock:
+        cached = _RESPONSE_CACHE.get(key)
+    if cached and now - cached[1] < _RESPONSE_CACHE_TTL:
+        return json.loads(cached[0])
+    
+    # Stream the completion so callers can show the response as it arrives
+    stream = openai.chat.completions.create(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        response_format={"type": "json_object"},
+        temperature=temperature,
+        stream=True,
+    )
+    
+    content_parts = []
+    for chunk in stream:
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            content_parts.append(delta)
+            if on_chunk:
+                on_chunk(delta)
+    
+    content = "".join(content_parts)
+    parsed = json.loads(content)
+    if validate and not validate(parsed):
+        raise ValueError("Response JSON doesn't have the expected shape")
+    
+    # Remember the response, dropping the oldest entry when full
+    with _response_cache_lock:
+        if key not in _RESPONSE_CACHE and len(_RESPONSE_CACHE) >= _RESPONSE_CACHE_SIZE:
+            _RESPONSE_CACHE.pop(next(iter(_RESPONSE_CACHE)))
+        _RESPONSE_CACHE[key] = (content, now)
+    
+    return parsed
+
+def generate_investment_recommendations(portfolio, risk_profile, market="US", financial_goals=None, on_chunk=None):
     """
     Generate personalized investment recommendations using AI based on user portfolio and risk profile.
     
@@ -17,6 +173,7 @@ def generate_investment_recommendations(portfolio, risk_profile, market="US", fi
         risk_profile (str): User's risk profile (Low, Medium or High Risk)
         market (str): Target market (US or INDIA)
         financial_goals (list, optional): User's financial goals
+        on_chunk (callable, optional): Called with each piece of the response text as it streams in
         
     Returns:
         dict: AI-generated investment recommendations
@@ -31,38 +188,16 @@ def generate_investment_recommendations(portfolio, risk_profile, market="US", fi
             goals_summary = format_goals_summary(financial_goals)
         
         # Construct the prompt for the AI
-        prompt = f"""
-        As a financial advisor, analyze this investment portfolio and provide recommendations.
-        
-        PORTFOLIO DATA:
-        {portfolio_summary}
-        
-        RISK PROFILE: {risk_profile}
-        MARKET: {market}
-        
-        {goals_summary}
-        
-        Provide the following in JSON format:
-        1. A brief assessment of the current portfolio
-        2. Three specific investment recommendations with tickers
-        3. Long-term strategy suggestions
-        4. One area of concern or risk
-        
-        Response should be valid JSON with these keys: 
-        "assessment", "specific_recommendations", "long_term_strategy", "risk_warning"
-        """
-        
-        # Call OpenAI API
-        response = openai.chat.completions.create(
-            model="gpt-4o",  # the newest OpenAI model is "gpt-4o" which was released May 13, 2024. do not change this unless explicitly requested by the user
-            messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"},
-            temperature=0.7,
+        prompt = _RECOMMENDATIONS_PROMPT.format(
+            portfolio_summary=portfolio_summary,
+            risk_profile=risk_profile,
+            market=market,
+            goals_summary=goals_summary
         )
         
-        # Parse the JSON response
+        # Call OpenAI API (or reuse the response to an identical request) and parse the JSON
         try:
-            recommendations = json.loads(response.choices[0].message.content)
+            recommendations = _cached_json_chat(prompt, on_chunk=on_chunk)
             return recommendations
         except json.JSONDecodeError:
             # Fallback to text response if JSON parsing fails
@@ -82,13 +217,14 @@ def generate_investment_recommendations(portfolio, risk_profile, market="US", fi
             "risk_warning": f"Error: {str(e)}"
         }
 
-def generate_tax_optimization_advice(portfolio, country="US"):
+def generate_tax_optimization_advice(portfolio, country="US", on_chunk=None):
     """
     Generate tax optimization advice for the user's portfolio.
     
     Args:
         portfolio (list): User's current portfolio
         country (str): User's country for tax rules (US or INDIA)
+        on_chunk (callable, optional): Called with each piece of the response text as it streams in
         
     Returns:
         dict: Tax optimization recommendations
@@ -101,40 +237,15 @@ def generate_tax_optimization_advice(portfolio, country="US"):
         current_year = datetime.datetime.now().year
         
         # Construct the prompt for the AI
-        prompt = f"""
-        As a tax advisor specializing in investment tax optimization, analyze this portfolio 
-        and provide tax-efficient recommendations.
-        
-        PORTFOLIO DATA:
-        {portfolio_summary}
-        
-        COUNTRY: {country}
-        CURRENT TAX YEAR: {current_year}
-        
-        Provide the following in JSON format:
-        1. Tax-loss harvesting opportunities
-        2. Tax-advantaged account recommendations
-        3. Long-term vs short-term capital gains considerations
-        4. Specific tax-efficient investment alternatives
-        
-        For India, consider STCG, LTCG rules, ELSS funds, and 80C deductions.
-        For US, consider 401k, IRA, Roth considerations, wash sale rules, and qualified dividends.
-        
-        Response should be valid JSON with these keys:
-        "tax_loss_harvesting", "tax_advantaged_accounts", "capital_gains_strategy", "tax_efficient_alternatives"
-        """
-        
-        # Call OpenAI API
-        response = openai.chat.completions.create(
-            model="gpt-4o",  # the newest OpenAI model is "gpt-4o" which was released May 13, 2024. do not change this unless explicitly requested by the user
-            messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"},
-            temperature=0.7,
+        prompt = _TAX_PROMPT.format(
+            portfolio_summary=portfolio_summary,
+            country=country,
+            current_year=current_year
         )
         
-        # Parse the JSON response
+        # Call OpenAI API (or reuse the response to an identical request) and parse the JSON
         try:
-            tax_advice = json.loads(response.choices[0].message.content)
+            tax_advice = _cached_json_chat(prompt, on_chunk=on_chunk)
             return tax_advice
         except json.JSONDecodeError:
             # Fallback if JSON parsing fails
@@ -160,10 +271,9 @@ def format_portfolio_summary(portfolio):
     if not portfolio:
         return "Empty portfolio"
         
-    total_value = sum(item.get('amount', 0) for item in portfolio)
-    
-    summary = f"Total portfolio value: ${total_value:,.2f}\n\n"
-    summary += "INVESTMENTS:\n"
+    # Build the investment lines and the total in one pass, then add the header
+    parts = []
+    total_value = 0
     
     for item in portfolio:
         item_type = item.get('type', 'Investment')
@@ -172,13 +282,14 @@ def format_portfolio_summary(portfolio):
         amount = item.get('amount', 0)
         ticker = item.get('ticker', 'N/A')
         
-        summary += f"- {name} ({ticker}): ${amount:,.2f}, Category: {category}, Type: {item_type}\n"
+        total_value += amount
+        parts.append(f"- {name} ({ticker}): ${amount:,.2f}, Category: {category}, Type: {item_type}\n")
         
         # Add SIP details if applicable
         if item_type == "SIP" and 'monthly_amount' in item and 'months_invested' in item:
-            summary += f"  Monthly: ${item['monthly_amount']:,.2f}, Months: {item['months_invested']}\n"
+            parts.append(f"  Monthly: ${item['monthly_amount']:,.2f}, Months: {item['months_invested']}\n")
     
-    return summary
+    return f"Total portfolio value: ${total_value:,.2f}\n\nINVESTMENTS:\n" + "".join(parts)
 
 def format_goals_summary(goals):
     """Format financial goals for AI prompt"""
@@ -198,13 +309,14 @@ def format_goals_summary(goals):
     
     return summary
 
-def analyze_portfolio_strengths_weaknesses(portfolio, risk_profile):
+def analyze_portfolio_strengths_weaknesses(portfolio, risk_profile, on_chunk=None):
     """
     Analyze portfolio strengths and weaknesses using AI.
     
     Args:
         portfolio (list): User's current portfolio
         risk_profile (str): User's risk profile
+        on_chunk (callable, optional): Called with each piece of the response text as it streams in
         
     Returns:
         dict: Portfolio SWOT analysis
@@ -214,31 +326,14 @@ def analyze_portfolio_strengths_weaknesses(portfolio, risk_profile):
         portfolio_summary = format_portfolio_summary(portfolio)
         
         # Construct the prompt
-        prompt = f"""
-        As a portfolio analyst, perform a SWOT analysis on this investment portfolio.
-        
-        PORTFOLIO DATA:
-        {portfolio_summary}
-        
-        RISK PROFILE: {risk_profile}
-        
-        Provide a SWOT analysis in JSON format with these keys:
-        "strengths", "weaknesses", "opportunities", "threats"
-        
-        Each section should have 2-3 specific points relevant to this portfolio.
-        """
-        
-        # Call OpenAI API
-        response = openai.chat.completions.create(
-            model="gpt-4o",  # the newest OpenAI model is "gpt-4o" which was released May 13, 2024. do not change this unless explicitly requested by the user
-            messages=[{"role": "user", "content": prompt}],
-            response_format={"type": "json_object"},
-            temperature=0.7,
+        prompt = _SWOT_PROMPT.format(
+            portfolio_summary=portfolio_summary,
+            risk_profile=risk_profile
         )
         
-        # Parse the JSON response
+        # Call OpenAI API (or reuse the response to an identical request) and parse the JSON
         try:
-            swot_analysis = json.loads(response.choices[0].message.content)
+            swot_analysis = _cached_json_chat(prompt, on_chunk=on_chunk)
             return swot_analysis
         except json.JSONDecodeError:
             # Fallback if JSON parsing fails
@@ -257,4 +352,79 @@ def analyze_portfolio_strengths_weaknesses(portfolio, risk_profile):
             "opportunities": ["Unable to analyze portfolio opportunities at this time."],
             "threats": ["Unable to analyze portfolio threats at this time."],
             "error": str(e)
-        }
\ No newline at end of file
+        }
+
+async def build_full_report(portfolio, risk_profile, market="US", financial_goals=None):
+    """
+    Generate investment recommendations, tax advice and a SWOT analysis concurrently.
+    
+    Each analysis is a separate OpenAI request, so running them side by side takes
+    about as long as the slowest one rather than the sum of all three.
+    
+    Args:
+        portfolio (list): User's current portfolio
+        risk_profile (str): User's risk profile
+        market (str): Target market and tax jurisdiction (US or INDIA)
+        financial_goals (list, optional): User's financial goals
+        
+    Returns:
+        tuple: (recommendations, tax_advice, swot_analysis)
+    """
+    return tuple(await asyncio.gather(
+        asyncio.to_thread(generate_investment_recommendations, portfolio, risk_profile, market, financial_goals),
+        asyncio.to_thread(generate_tax_optimization_advice, portfolio, market),
+        asyncio.to_thread(analyze_portfolio_strengths_weaknesses, portfolio, risk_profile)
+    ))
+
+_FULL_REPORT_SECTIONS = ("recommendations", "tax", "swot")
+
+def _has_full_report_sections(report):
+    """Check that a combined report response has every section as an object."""
+    return isinstance(report, dict) and all(isinstance(report.get(key), dict) for key in _FULL_REPORT_SECTIONS)
+
+def generate_full_report(portfolio, risk_profile, market="US", financial_goals=None, on_chunk=None):
+    """
+    Generate investment recommendations, tax advice and a SWOT analysis in one request.
+    
+    The three analyses share the same portfolio data, so asking for them together sends
+    it once and takes one round trip instead of three. If the combined response can't be
+    used, the analyses are requested separately via build_full_report.
+    
+    Args:
+        portfolio (list): User's current portfolio
+        risk_profile (str): User's risk profile
+        market (str): Target market and tax jurisdiction (US or INDIA)
+        financial_goals (list, optional): User's financial goals
+        on_chunk (callable, optional): Called with each piece of the combined response text as it
+            streams in. Not called for the separate requests if it falls back to them
+        
+    Returns:
+        tuple: (recommendations, tax_advice, swot_analysis)
+    """
+    try:
+        # Format the portfolio data and goals once for all three analyses
+        portfolio_summary = format_portfolio_summary(portfolio)
+        goals_summary = format_goals_summary(financial_goals) if financial_goals else ""
+        current_year = datetime.datetime.now().year
+        
+        # Construct a single prompt covering all three analyses
+        prompt = _FULL_REPORT_PROMPT.format(
+            portfolio_summary=portfolio_summary,
+            risk_profile=risk_profile,
+            market=market,
+            current_year=current_year,
+            goals_summary=goals_summary
+        )
+        
+        # Call OpenAI API (or reuse the response to an identical request) and split the sections
+        # A response missing a section is rejected before it's cached, so the next
+        # request asks again instead of falling back for the cache's lifetime
+        report = _cached_json_chat(prompt, on_chunk=on_chunk, validate=_has_full_report_sections)
+        return tuple(report[key] for key in _FULL_REPORT_SECTIONS)
+        
+    except Exception as e:
+        print(f"Error generating combined AI report: {e}")
+    
+    # Fall back to requesting each analysis on its own. These run on worker threads,
+    # which can't draw to the page, so the fallback doesn't stream to on_chunk
+    return asyncio.run(build_full_report(portfolio, risk_profile, market, financial_goals))
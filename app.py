@@ -1,11 +1,11 @@
 import streamlit as st
 import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
+import numpy as np
 import hashlib
 import datetime
 import os
-from utils import SESSION_KEYS, initialize_session_state, get_risk_profile_allocation, get_asset_category_color
+import time
+from utils import SESSION_KEYS, initialize_session_state, get_risk_profile_allocation, get_asset_category_color, build_portfolio_frame
 from portfolio_analyzer import analyze_portfolio, get_allocation_recommendation
 from stock_service import get_stock_suggestions, fetch_stock_data, get_sip_suggestions
 import database as db
@@ -14,14 +14,16 @@ from price_alerts import create_price_alert, get_user_price_alerts, delete_price
 from ai_recommendations import (
     generate_investment_recommendations,
     generate_tax_optimization_advice,
-    analyze_portfolio_strengths_weaknesses
+    analyze_portfolio_strengths_weaknesses,
+    generate_full_report
 )
 from advanced_analytics import (
     predict_portfolio_performance,
     analyze_sector_exposure,
     generate_economic_scenario_analysis,
     calculate_modern_portfolio_theory_metrics,
-    get_ai_portfolio_insights
+    get_ai_portfolio_insights,
+    run_all_analytics
 )
 
 
@@ -30,10 +32,196 @@ from advanced_analytics import (
 from dotenv import load_dotenv
 load_dotenv()
 
+# Static UI options and text, built once at import rather than on every rerun.
+# Navigation screens, in NAVIGATION_INDEX order
+_NAV_OPTIONS = (
+    "Welcome", "Risk Profile", "Portfolio Input", "Portfolio Analysis",
+    "Recommendations", "Stock Selection", "Summary", "Portfolio Management", "Financial Goals", "Price Alerts",
+    "AI Recommendations", "Tax Optimization", "Advanced Analytics"
+)
+_NAV_OPTIONS_GUEST = _NAV_OPTIONS[:7]
+_NAV_OPTIONS_GUEST_NO_PROFILE = _NAV_OPTIONS[:2]
+_NAV_OPTIONS_NO_PROFILE = ("Welcome", "Risk Profile", "Portfolio Management")
+# Screen name -> NAVIGATION_INDEX, so a sidebar selection maps to its screen in one lookup
+_NAV_INDEX = {name: index for index, name in enumerate(_NAV_OPTIONS)}
+
+_RISK_PROFILES = {
+    "Low Risk (Conservative)": """
+    - Focus on capital preservation
+    - Stable, consistent returns
+    - Lower volatility
+    - Suitable for short-term goals or retirement
+    """,
+    "Medium Risk (Balanced)": """
+    - Balance between growth and safety
+    - Moderate volatility
+    - Suitable for medium-term goals
+    """,
+    "High Risk (Aggressive)": """
+    - Focus on capital appreciation
+    - Higher volatility
+    - Potentially higher returns
+    - Suitable for long-term goals
+    """
+}
+
+_CATEGORIES = ("Large Cap", "Mid Cap", "Small Cap", "Gold", "ETFs/Crypto", "Other")
+
+# Portfolios up to this many rows are shown as a static st.table rather than st.dataframe
+_STATIC_TABLE_MAX_ROWS = 200
+
+_WELCOME_MD = """
+### Your Personal Portfolio Balancing Assistant
 
+PortaAi helps you balance your stock portfolio according to your risk tolerance.
 
+**What we offer:**
+- Portfolio analysis based on your risk profile
+- Visual representation of your current allocation
+- Recommendations for balanced distribution
+- Personalized stock and SIP suggestions
+- Support for both Indian and US markets
+- AI-powered investment recommendations
+- Tax optimization strategies
+- Advanced portfolio analytics
+- Mobile-responsive interface
+"""
 
+_NEXT_STEPS_MD = """
+### Implementing Your Investment Plan:
 
+1. **For Stocks/ETFs:**
+   - Open a brokerage account if you don't have one
+   - Place orders for the selected stocks in the recommended proportions
+   - Consider dollar-cost averaging for large investments
+
+2. **For SIPs:**
+   - Set up systematic investment plans with the selected mutual funds
+   - Choose a convenient date for monthly debits
+   - Consider dividing your monthly investment across multiple funds
+
+3. **Portfolio Maintenance:**
+   - Review your portfolio quarterly
+   - Rebalance annually or when allocation drifts more than 5% from targets
+   - Consider tax implications when selling investments
+"""
+
+# Cached wrappers around the stock service, so widget reruns don't repeat the lookups
+@st.cache_data(ttl=300)
+def _cached_suggestions(category, market):
+    """Get stock suggestions for a category and market, cached for five minutes."""
+    return get_stock_suggestions(category, market)
+
+# How long fetched prices are reused, both by _cached_prices and the session ticker data
+_PRICE_TTL = 60  # seconds
+
+@st.cache_data(ttl=_PRICE_TTL)
+def _cached_prices(tickers):
+    """Fetch current stock data for a sorted tuple of tickers, cached for a minute."""
+    return fetch_stock_data(list(tickers))
+
+def _get_ticker_data(tickers):
+    """
+    Get current stock data for tickers, fetching only those not in the session or older than _PRICE_TTL.
+    
+    Args:
+        tickers (iterable): Stock ticker symbols
+        
+    Returns:
+        dict: Session-wide ticker data, by ticker
+    """
+    ticker_data = st.session_state[SESSION_KEYS.TICKER_DATA]
+    fetched_at = st.session_state[SESSION_KEYS.TICKER_DATA_FETCHED_AT]
+    now = time.time()
+    missing = tuple(sorted(
+        ticker for ticker in set(tickers)
+        if now - fetched_at.get(ticker, 0) >= _PRICE_TTL
+    ))
+    if missing:
+        prices = _cached_prices(missing)
+        ticker_data.update(prices)
+        fetched_at.update(dict.fromkeys(prices, now))
+    return ticker_data
+
+# Portfolio analysis is deterministic, so it's cached per portfolio and risk profile
+@st.cache_data
+def _cached_analysis(portfolio, risk_profile):
+    """Analyze a portfolio against a risk profile, cached per input."""
+    return analyze_portfolio(portfolio, risk_profile)
+
+@st.cache_data
+def _cached_recommendation(portfolio, analysis_result):
+    """Generate rebalancing recommendations, cached per portfolio and analysis."""
+    return get_allocation_recommendation(portfolio, analysis_result)
+
+def _analysis_key():
+    """Cheap fingerprint of the portfolio and risk profile the analysis depends on"""
+    return (
+        tuple((item['name'], item['category'], item['amount']) for item in st.session_state[SESSION_KEYS.PORTFOLIO]),
+        st.session_state[SESSION_KEYS.RISK_PROFILE]
+    )
+
+# Cached as a resource so repeat renders reuse the figure itself instead of unpickling a copy.
+# The figure is shared, so callers must not modify it
+@st.cache_resource
+def _allocation_pie(names, values, title, categories=None, compact=False):
+    """
+    Build an allocation pie chart colored by asset category, cached per input.
+    
+    Args:
+        names (tuple): Slice labels
+        values (tuple): Slice values
+        title (str): Chart title
+        categories (tuple, optional): Asset category of each slice, for its color. Defaults to names
+        compact (bool, optional): Drop the side and bottom margins. Defaults to False
+        
+    Returns:
+        plotly.graph_objects.Figure: Pie chart (shared, do not modify)
+    """
+    # Plotly is slow to import, so load it on the first chart rather than on the Welcome screen
+    import plotly.express as px
+    
+    fig = px.pie(
+        names=list(names),
+        values=list(values),
+        title=title,
+        color=list(categories or names),
+        color_discrete_map=get_asset_category_color()
+    )
+    if compact:
+        fig.update_layout(margin=dict(l=0, r=0, t=40, b=0))
+    return fig
+
+def _format_metric(value, suffix=""):
+    """Format a metric to two decimals, or "N/A" when it wasn't computed"""
+    return "N/A" if value is None else f"{value:.2f}{suffix}"
+
+def _stream_preview(placeholder):
+    """
+    Build an on_chunk callback that shows an AI response in a placeholder as it streams in.
+    
+    Args:
+        placeholder: st.empty() placeholder to draw the partial response in
+        
+    Returns:
+        callable: Callback taking each new piece of response text
+    """
+    parts = []
+    def on_chunk(content):
+        parts.append(content)
+        placeholder.code("".join(parts), language="json")
+    return on_chunk
+
+def _goto(index, updates=None):
+    """
+    Switch to another screen, applying any other session state changes in the same update.
+    
+    Args:
+        index (int): NAVIGATION_INDEX of the screen to show
+        updates (dict, optional): Other session state values to set, by key
+    """
+    st.session_state.update({**(updates or {}), SESSION_KEYS.NAVIGATION_INDEX: index})
+    st.rerun()
 
 def main():
     # Set up page configuration
@@ -46,6 +234,10 @@ def main():
     # Initialize session state values
     initialize_session_state()
     
+    # Bind the session state and the current screen index once for the sidebar below
+    session_state = st.session_state
+    nav_index = session_state[SESSION_KEYS.NAVIGATION_INDEX]
+    
     # Sidebar navigation
     with st.sidebar:
         st.title("PortaAi")
@@ -55,79 +247,66 @@ def main():
         market = st.radio(
             "Select Market",
             ["INDIA", "US"],
-            index=0 if st.session_state[SESSION_KEYS.MARKET] == "INDIA" else 1
+            index=0 if session_state[SESSION_KEYS.MARKET] == "INDIA" else 1
         )
-        st.session_state[SESSION_KEYS.MARKET] = market
+        session_state[SESSION_KEYS.MARKET] = market
         
         # Show navigation options based on authentication and profile status
-        if st.session_state[SESSION_KEYS.IS_LOGGED_IN]:
+        if session_state[SESSION_KEYS.IS_LOGGED_IN]:
             # Navigation for logged-in users
-            if st.session_state[SESSION_KEYS.RISK_PROFILE]:
+            if session_state[SESSION_KEYS.RISK_PROFILE]:
                 # Full navigation if risk profile is set
                 navigation = st.radio(
                     "Navigation",
-                    ["Welcome", "Risk Profile", "Portfolio Input", "Portfolio Analysis", 
-                     "Recommendations", "Stock Selection", "Summary", "Portfolio Management", "Financial Goals", "Price Alerts",
-                     "AI Recommendations", "Tax Optimization", "Advanced Analytics"],
-                    index=st.session_state[SESSION_KEYS.NAVIGATION_INDEX]
+                    _NAV_OPTIONS,
+                    index=nav_index
                 )
                 
                 # Update navigation state based on selection
-                nav_options = ["Welcome", "Risk Profile", "Portfolio Input", "Portfolio Analysis", 
-                              "Recommendations", "Stock Selection", "Summary", "Portfolio Management", "Financial Goals", "Price Alerts",
-                              "AI Recommendations", "Tax Optimization", "Advanced Analytics"]
-                st.session_state[SESSION_KEYS.NAVIGATION_INDEX] = nav_options.index(navigation)
+                session_state[SESSION_KEYS.NAVIGATION_INDEX] = _NAV_INDEX[navigation]
             else:
                 # Limited navigation if no risk profile yet
                 navigation = st.radio(
                     "Navigation",
-                    ["Welcome", "Risk Profile", "Portfolio Management"],
-                    index=st.session_state[SESSION_KEYS.NAVIGATION_INDEX]
+                    _NAV_OPTIONS_NO_PROFILE,
+                    index=nav_index
                 )
                 
                 # Make sure the index matches the selection
-                if navigation == "Welcome":
-                    st.session_state[SESSION_KEYS.NAVIGATION_INDEX] = 0
-                elif navigation == "Risk Profile":
-                    st.session_state[SESSION_KEYS.NAVIGATION_INDEX] = 1
-                elif navigation == "Portfolio Management":
-                    st.session_state[SESSION_KEYS.NAVIGATION_INDEX] = 7
+                session_state[SESSION_KEYS.NAVIGATION_INDEX] = _NAV_INDEX[navigation]
             
             # Logout option for logged-in users
             if st.button("Logout"):
                 # Reset user session state
-                st.session_state[SESSION_KEYS.IS_LOGGED_IN] = False
-                st.session_state[SESSION_KEYS.USER_ID] = None
-                st.session_state[SESSION_KEYS.USER_NAME] = None
-                st.session_state[SESSION_KEYS.USER_EMAIL] = None
-                st.session_state[SESSION_KEYS.CURRENT_PORTFOLIO_ID] = None
-                st.session_state[SESSION_KEYS.CURRENT_PORTFOLIO_NAME] = None
-                st.session_state[SESSION_KEYS.USER_PORTFOLIOS] = []
-                st.session_state[SESSION_KEYS.NAVIGATION_INDEX] = 0
-                st.rerun()
+                _goto(0, {
+                    SESSION_KEYS.IS_LOGGED_IN: False,
+                    SESSION_KEYS.USER_ID: None,
+                    SESSION_KEYS.USER_NAME: None,
+                    SESSION_KEYS.USER_EMAIL: None,
+                    SESSION_KEYS.CURRENT_PORTFOLIO_ID: None,
+                    SESSION_KEYS.CURRENT_PORTFOLIO_NAME: None,
+                    SESSION_KEYS.USER_PORTFOLIOS: []
+                })
         else:
             # Navigation for non-logged in users
-            if st.session_state[SESSION_KEYS.RISK_PROFILE]:
+            if session_state[SESSION_KEYS.RISK_PROFILE]:
                 navigation = st.radio(
                     "Navigation",
-                    ["Welcome", "Risk Profile", "Portfolio Input", "Portfolio Analysis", 
-                     "Recommendations", "Stock Selection", "Summary"],
-                    index=st.session_state[SESSION_KEYS.NAVIGATION_INDEX]
+                    _NAV_OPTIONS_GUEST,
+                    index=nav_index
                 )
                 
                 # Update navigation state based on selection
-                nav_options = ["Welcome", "Risk Profile", "Portfolio Input", "Portfolio Analysis", 
-                              "Recommendations", "Stock Selection", "Summary"]
-                st.session_state[SESSION_KEYS.NAVIGATION_INDEX] = nav_options.index(navigation)
+                session_state[SESSION_KEYS.NAVIGATION_INDEX] = _NAV_INDEX[navigation]
             else:
                 navigation = st.radio(
                     "Navigation",
-                    ["Welcome", "Risk Profile"],
-                    index=st.session_state[SESSION_KEYS.NAVIGATION_INDEX]
+                    _NAV_OPTIONS_GUEST_NO_PROFILE,
+                    index=nav_index
                 )
     
     # Display login/register screens if not logged in
-    if not st.session_state[SESSION_KEYS.IS_LOGGED_IN]:
+    if not session_state[SESSION_KEYS.IS_LOGGED_IN]:
         # Navigation between login and register for non-logged in users
         auth_nav = st.sidebar.radio(
             "Authentication",
@@ -142,60 +321,19 @@ def main():
     else:
         # For logged in users, show regular navigation
         # Display the appropriate screen based on navigation
-        if st.session_state[SESSION_KEYS.NAVIGATION_INDEX] == 0:
-            show_welcome_screen()
-        elif st.session_state[SESSION_KEYS.NAVIGATION_INDEX] == 1:
-            show_risk_profile_screen()
-        elif st.session_state[SESSION_KEYS.NAVIGATION_INDEX] == 2:
-            show_portfolio_input_screen()
-        elif st.session_state[SESSION_KEYS.NAVIGATION_INDEX] == 3:
-            show_portfolio_analysis_screen()
-        elif st.session_state[SESSION_KEYS.NAVIGATION_INDEX] == 4:
-            show_recommendations_screen()
-        elif st.session_state[SESSION_KEYS.NAVIGATION_INDEX] == 5:
-            show_stock_selection_screen()
-        elif st.session_state[SESSION_KEYS.NAVIGATION_INDEX] == 6:
-            show_summary_screen()
-        elif st.session_state[SESSION_KEYS.NAVIGATION_INDEX] == 7:
-            show_portfolio_management_screen()
-        elif st.session_state[SESSION_KEYS.NAVIGATION_INDEX] == 8:
-            show_financial_goals_screen()
-        elif st.session_state[SESSION_KEYS.NAVIGATION_INDEX] == 9:
-            show_price_alerts_screen()
-        elif st.session_state[SESSION_KEYS.NAVIGATION_INDEX] == 10:
-            show_ai_recommendations_screen()
-        elif st.session_state[SESSION_KEYS.NAVIGATION_INDEX] == 11:
-            show_tax_optimization_screen()
-        elif st.session_state[SESSION_KEYS.NAVIGATION_INDEX] == 12:
-            show_advanced_analytics_screen()
+        _SCREENS[session_state[SESSION_KEYS.NAVIGATION_INDEX]]()
 
 def show_welcome_screen():
     st.title("Welcome to PortaAi")
     
-    st.markdown("""
-    ### Your Personal Portfolio Balancing Assistant
-    
-    PortaAi helps you balance your stock portfolio according to your risk tolerance.
-    
-    **What we offer:**
-    - Portfolio analysis based on your risk profile
-    - Visual representation of your current allocation
-    - Recommendations for balanced distribution
-    - Personalized stock and SIP suggestions
-    - Support for both Indian and US markets
-    - AI-powered investment recommendations
-    - Tax optimization strategies
-    - Advanced portfolio analytics
-    - Mobile-responsive interface
-    """)
+    st.markdown(_WELCOME_MD)
     
     # Create columns for better layout
     col1, col2, col3 = st.columns([1, 2, 1])
     
     with col2:
         if st.button("Get Started", use_container_width=True):
-            st.session_state[SESSION_KEYS.NAVIGATION_INDEX] = 1
-            st.rerun()
+            _goto(1)
 
 def show_risk_profile_screen():
     st.title("Select Your Risk Strategy")
@@ -210,62 +348,98 @@ def show_risk_profile_screen():
     col1, col2 = st.columns([3, 1])
     
     with col1:
-        risk_profiles = {
-            "Low Risk (Conservative)": """
-                - Focus on capital preservation
-                - Stable, consistent returns
-                - Lower volatility
-                - Suitable for short-term goals or retirement
-            """,
-            "Medium Risk (Balanced)": """
-                - Balance between growth and safety
-                - Moderate volatility
-                - Suitable for medium-term goals
-            """,
-            "High Risk (Aggressive)": """
-                - Focus on capital appreciation
-                - Higher volatility
-                - Potentially higher returns
-                - Suitable for long-term goals
-            """
-        }
         
         # Fix index determination
         default_index = 0
         if st.session_state[SESSION_KEYS.RISK_PROFILE] != "":
             try:
-                default_index = list(risk_profiles.keys()).index(st.session_state[SESSION_KEYS.RISK_PROFILE])
+                default_index = list(_RISK_PROFILES).index(st.session_state[SESSION_KEYS.RISK_PROFILE])
             except ValueError:
                 default_index = 0
         
         selected_risk = st.radio(
             "Select your risk tolerance:",
-            list(risk_profiles.keys()),
+            list(_RISK_PROFILES),
             index=default_index
         )
         
-        st.markdown(risk_profiles[selected_risk])
+        st.markdown(_RISK_PROFILES[selected_risk])
     
     with col2:
         # Show allocation pie chart based on risk profile
         if selected_risk:
-            fig = px.pie(
-                names=list(get_risk_profile_allocation(selected_risk).keys()),
-                values=list(get_risk_profile_allocation(selected_risk).values()),
-                title=f"Recommended Allocation",
-                color=list(get_risk_profile_allocation(selected_risk).keys()),
-                color_discrete_map=get_asset_category_color()
-            )
+            allocation = get_risk_profile_allocation(selected_risk)
+            fig = _allocation_pie(tuple(allocation), tuple(allocation.values()), "Recommended Allocation")
             st.plotly_chart(fig, use_container_width=True)
     
     if st.button("Next", use_container_width=True):
-        # Save the risk profile before changing navigation index
-        st.session_state[SESSION_KEYS.RISK_PROFILE] = selected_risk
-        
-        # Set next page to portfolio input
-        st.session_state[SESSION_KEYS.NAVIGATION_INDEX] = 2
-        st.rerun()
+        # Save the risk profile and go to portfolio input
+        _goto(2, {SESSION_KEYS.RISK_PROFILE: selected_risk})
+
+def _set_portfolio(items):
+    """Replace the portfolio and its stored total and DataFrame"""
+    frame = build_portfolio_frame(items)
+    st.session_state[SESSION_KEYS.PORTFOLIO] = items
+    st.session_state[SESSION_KEYS.PORTFOLIO_TOTAL] = float(frame['amount'].sum())
+    st.session_state[SESSION_KEYS.PORTFOLIO_DF] = frame
+
+def _add_to_portfolio(item):
+    """Add an investment to the portfolio, auto-saving it for a logged-in user's current portfolio"""
+    st.session_state[SESSION_KEYS.PORTFOLIO].append(item)
+    st.session_state[SESSION_KEYS.PORTFOLIO_TOTAL] += item['amount']
+    st.session_state[SESSION_KEYS.PORTFOLIO_DF] = build_portfolio_frame(st.session_state[SESSION_KEYS.PORTFOLIO])
+    
+    # Auto-save if user is logged in and has a current portfolio
+    if st.session_state[SESSION_KEYS.IS_LOGGED_IN] and st.session_state[SESSION_KEYS.CURRENT_PORTFOLIO_ID]:
+        save_current_portfolio_to_database()
+        st.session_state[SESSION_KEYS.PORTFOLIO_FLASH] = "Portfolio automatically saved!"
+
+# Form and button callbacks for the portfolio input screen. These run before the
+# rerun the widget triggers, so the portfolio table is current without a second st.rerun().
+# Anything drawn in a callback lands outside the screen's fragment, so confirmation
+# messages are left in PORTFOLIO_FLASH for the screen to show
+def _submit_stock_form():
+    """Add the submitted Stock/ETF form to the portfolio"""
+    stock_name = st.session_state["stock_name_input"]
+    investment_amount = st.session_state["stock_amount_input"]
+    
+    if stock_name and investment_amount > 0:
+        _add_to_portfolio({
+            "name": stock_name,
+            "category": st.session_state["stock_category_input"],
+            "amount": investment_amount,
+            "type": "Stock/ETF"
+        })
+
+def _submit_sip_form():
+    """Add the submitted SIP form to the portfolio"""
+    sip_name = st.session_state["sip_name_input"]
+    monthly_amount = st.session_state["sip_monthly_input"]
+    months_invested = st.session_state["sip_months_input"]
+    total_sip_amount = monthly_amount * months_invested
+    
+    if sip_name and total_sip_amount > 0:
+        _add_to_portfolio({
+            "name": sip_name,
+            "category": st.session_state["sip_category_input"],
+            "amount": total_sip_amount,
+            "monthly_amount": monthly_amount,
+            "months_invested": months_invested,
+            "type": "SIP"
+        })
+
+def _clear_portfolio():
+    """Remove all investments from the portfolio"""
+    _set_portfolio([])
+    
+    # Auto-save the empty portfolio if user is logged in and has a current portfolio
+    if st.session_state[SESSION_KEYS.IS_LOGGED_IN] and st.session_state[SESSION_KEYS.CURRENT_PORTFOLIO_ID]:
+        save_current_portfolio_to_database()
+        st.session_state[SESSION_KEYS.PORTFOLIO_FLASH] = "Portfolio cleared and saved!"
 
+# As a fragment, adding or clearing investments reruns only this screen, not the sidebar.
+# "Analyze Portfolio" still navigates with a full-app rerun through _goto
+@st.fragment
 def show_portfolio_input_screen():
     st.title("Current Portfolio Input")
     
@@ -275,18 +449,25 @@ def show_portfolio_input_screen():
     Add your existing stocks, SIPs and other investments to analyze your portfolio.
     """)
     
-    # Initialize portfolio in session if not exists
-    if SESSION_KEYS.PORTFOLIO not in st.session_state:
-        st.session_state[SESSION_KEYS.PORTFOLIO] = []
+    # Show the confirmation left by a form or button callback, once
+    flash = st.session_state[SESSION_KEYS.PORTFOLIO_FLASH]
+    if flash:
+        st.success(flash)
+        st.session_state[SESSION_KEYS.PORTFOLIO_FLASH] = None
     
     # Display current portfolio items if any
     if st.session_state[SESSION_KEYS.PORTFOLIO]:
         st.subheader("Your Current Portfolio")
-        df = pd.DataFrame(st.session_state[SESSION_KEYS.PORTFOLIO])
-        st.dataframe(df)
+        # A static table is lighter to render for a typical portfolio; only large
+        # ones need the scrolling grid
+        portfolio_df = st.session_state[SESSION_KEYS.PORTFOLIO_DF]
+        if len(portfolio_df) <= _STATIC_TABLE_MAX_ROWS:
+            st.table(portfolio_df)
+        else:
+            st.dataframe(portfolio_df)
         
         # Calculate total investment
-        total_investment = sum(item['amount'] for item in st.session_state[SESSION_KEYS.PORTFOLIO])
+        total_investment = st.session_state[SESSION_KEYS.PORTFOLIO_TOTAL]
         st.info(f"Total Investment: ${total_investment:,.2f}")
     
     # Create tabs for Stock and SIP input
@@ -300,33 +481,19 @@ def show_portfolio_input_screen():
             col1, col2 = st.columns(2)
             
             with col1:
-                stock_name = st.text_input("Stock/ETF Name")
+                st.text_input("Stock/ETF Name", key="stock_name_input")
             
             with col2:
-                stock_category = st.selectbox(
+                st.selectbox(
                     "Category",
-                    ["Large Cap", "Mid Cap", "Small Cap", "Gold", "ETFs/Crypto", "Other"]
+                    _CATEGORIES,
+                    key="stock_category_input"
                 )
             
-            investment_amount = st.number_input("Investment Amount ($)", min_value=0.0, step=100.0)
-            
-            submitted = st.form_submit_button("Add to Portfolio")
+            st.number_input("Investment Amount ($)", min_value=0.0, step=100.0, key="stock_amount_input")
             
-            if submitted and stock_name and investment_amount > 0:
-                # Add to portfolio
-                st.session_state[SESSION_KEYS.PORTFOLIO].append({
-                    "name": stock_name,
-                    "category": stock_category,
-                    "amount": investment_amount,
-                    "type": "Stock/ETF"
-                })
-                
-                # Auto-save if user is logged in and has a current portfolio
-                if st.session_state[SESSION_KEYS.IS_LOGGED_IN] and st.session_state[SESSION_KEYS.CURRENT_PORTFOLIO_ID]:
-                    save_current_portfolio_to_database()
-                    st.success("Portfolio automatically saved!")
-                
-                st.rerun()
+            # Add to portfolio
+            st.form_submit_button("Add to Portfolio", on_click=_submit_stock_form)
     
     with tab2:
         # Form for adding new SIP
@@ -336,21 +503,22 @@ def show_portfolio_input_screen():
             col1, col2 = st.columns(2)
             
             with col1:
-                sip_name = st.text_input("SIP/Mutual Fund Name")
+                st.text_input("SIP/Mutual Fund Name", key="sip_name_input")
             
             with col2:
-                sip_category = st.selectbox(
+                st.selectbox(
                     "SIP Category",
-                    ["Large Cap", "Mid Cap", "Small Cap", "Gold", "ETFs/Crypto", "Other"]
+                    _CATEGORIES,
+                    key="sip_category_input"
                 )
             
             col1, col2 = st.columns(2)
             
             with col1:
-                monthly_amount = st.number_input("Monthly SIP Amount ($)", min_value=0.0, step=50.0)
+                monthly_amount = st.number_input("Monthly SIP Amount ($)", min_value=0.0, step=50.0, key="sip_monthly_input")
             
             with col2:
-                months_invested = st.number_input("Months Invested So Far", min_value=0, step=1)
+                months_invested = st.number_input("Months Invested So Far", min_value=0, step=1, key="sip_months_input")
             
             # Calculate total invested amount
             total_sip_amount = monthly_amount * months_invested
@@ -358,38 +526,13 @@ def show_portfolio_input_screen():
             if monthly_amount > 0 and months_invested > 0:
                 st.write(f"Total SIP Investment: ${total_sip_amount:,.2f}")
             
-            submitted_sip = st.form_submit_button("Add SIP to Portfolio")
-            
-            if submitted_sip and sip_name and total_sip_amount > 0:
-                # Add to portfolio
-                st.session_state[SESSION_KEYS.PORTFOLIO].append({
-                    "name": sip_name,
-                    "category": sip_category,
-                    "amount": total_sip_amount,
-                    "monthly_amount": monthly_amount,
-                    "months_invested": months_invested,
-                    "type": "SIP"
-                })
-                
-                # Auto-save if user is logged in and has a current portfolio
-                if st.session_state[SESSION_KEYS.IS_LOGGED_IN] and st.session_state[SESSION_KEYS.CURRENT_PORTFOLIO_ID]:
-                    save_current_portfolio_to_database()
-                    st.success("Portfolio automatically saved!")
-                
-                st.rerun()
+            # Add to portfolio
+            st.form_submit_button("Add SIP to Portfolio", on_click=_submit_sip_form)
     
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        if st.button("Clear Portfolio", use_container_width=True):
-            st.session_state[SESSION_KEYS.PORTFOLIO] = []
-            
-            # Auto-save the empty portfolio if user is logged in and has a current portfolio
-            if st.session_state[SESSION_KEYS.IS_LOGGED_IN] and st.session_state[SESSION_KEYS.CURRENT_PORTFOLIO_ID]:
-                save_current_portfolio_to_database()
-                st.success("Portfolio cleared and saved!")
-                
-            st.rerun()
+        st.button("Clear Portfolio", use_container_width=True, on_click=_clear_portfolio)
     
     with col2:
         # Only show save button if user is logged in and has a current portfolio
@@ -397,13 +540,11 @@ def show_portfolio_input_screen():
             if st.button("Save Portfolio", use_container_width=True, disabled=len(st.session_state[SESSION_KEYS.PORTFOLIO]) == 0):
                 if save_current_portfolio_to_database():
                     st.success("Portfolio saved successfully!")
-                    st.rerun()
     
     with col3:
         # Only allow proceeding if portfolio has items
         if st.button("Analyze Portfolio", use_container_width=True, disabled=len(st.session_state[SESSION_KEYS.PORTFOLIO]) == 0):
-            st.session_state[SESSION_KEYS.NAVIGATION_INDEX] = 3
-            st.rerun()
+            _goto(3)
 
 def show_portfolio_analysis_screen():
     st.title("Portfolio Analysis")
@@ -412,17 +553,28 @@ def show_portfolio_analysis_screen():
     if not st.session_state[SESSION_KEYS.PORTFOLIO]:
         st.warning("No portfolio data available. Please go back and add your investments.")
         if st.button("Back to Portfolio Input"):
-            st.session_state[SESSION_KEYS.NAVIGATION_INDEX] = 2
-            st.rerun()
+            _goto(2)
         return
     
-    # Analyze the portfolio
-    analysis_result = analyze_portfolio(
-        st.session_state[SESSION_KEYS.PORTFOLIO],
-        st.session_state[SESSION_KEYS.RISK_PROFILE]
-    )
+    # Analyze the portfolio, reusing the stored result while the inputs are unchanged
+    key = _analysis_key()
+    if st.session_state[SESSION_KEYS.LAST_ANALYSIS_KEY] != key:
+        st.session_state[SESSION_KEYS.ANALYSIS_RESULT] = _cached_analysis(
+            st.session_state[SESSION_KEYS.PORTFOLIO],
+            st.session_state[SESSION_KEYS.RISK_PROFILE]
+        )
+        st.session_state[SESSION_KEYS.LAST_ANALYSIS_KEY] = key
+    
+    analysis_result = st.session_state[SESSION_KEYS.ANALYSIS_RESULT]
     
-    st.session_state[SESSION_KEYS.ANALYSIS_RESULT] = analysis_result
+    # Prefetch prices for every target category's suggestions in one batch, so browsing
+    # categories on the stock selection screen doesn't fetch each category separately
+    market = st.session_state[SESSION_KEYS.MARKET]
+    _get_ticker_data(
+        stock['ticker']
+        for category in analysis_result["target_allocation"]
+        for stock in _cached_suggestions(category, market)
+    )
     
     col1, col2 = st.columns(2)
     
@@ -430,12 +582,11 @@ def show_portfolio_analysis_screen():
         st.subheader("Current Allocation")
         
         # Create pie chart for current allocation
-        fig = px.pie(
-            names=list(analysis_result["current_allocation"].keys()),
-            values=list(analysis_result["current_allocation"].values()),
-            title="Current Portfolio Distribution",
-            color=list(analysis_result["current_allocation"].keys()),
-            color_discrete_map=get_asset_category_color()
+        current_allocation = analysis_result["current_allocation"]
+        fig = _allocation_pie(
+            tuple(current_allocation),
+            tuple(current_allocation.values()),
+            "Current Portfolio Distribution"
         )
         st.plotly_chart(fig, use_container_width=True)
     
@@ -443,12 +594,11 @@ def show_portfolio_analysis_screen():
         st.subheader("Target Allocation")
         
         # Create pie chart for target allocation
-        fig = px.pie(
-            names=list(analysis_result["target_allocation"].keys()),
-            values=list(analysis_result["target_allocation"].values()),
-            title=f"Target Allocation for {st.session_state[SESSION_KEYS.RISK_PROFILE]}",
-            color=list(analysis_result["target_allocation"].keys()),
-            color_discrete_map=get_asset_category_color()
+        target_allocation = analysis_result["target_allocation"]
+        fig = _allocation_pie(
+            tuple(target_allocation),
+            tuple(target_allocation.values()),
+            f"Target Allocation for {st.session_state[SESSION_KEYS.RISK_PROFILE]}"
         )
         st.plotly_chart(fig, use_container_width=True)
     
@@ -464,8 +614,7 @@ def show_portfolio_analysis_screen():
             st.success(insight["message"])
     
     if st.button("Get Recommendations", use_container_width=True):
-        st.session_state[SESSION_KEYS.NAVIGATION_INDEX] = 4
-        st.rerun()
+        _goto(4)
 
 def show_recommendations_screen():
     st.title("Investment Distribution Recommendations")
@@ -473,17 +622,19 @@ def show_recommendations_screen():
     if not st.session_state[SESSION_KEYS.ANALYSIS_RESULT]:
         st.warning("No analysis data available. Please go back and analyze your portfolio.")
         if st.button("Back to Analysis"):
-            st.session_state[SESSION_KEYS.NAVIGATION_INDEX] = 3
-            st.rerun()
+            _goto(3)
         return
     
-    # Get rebalance recommendations
-    recommendations = get_allocation_recommendation(
-        st.session_state[SESSION_KEYS.PORTFOLIO],
-        st.session_state[SESSION_KEYS.ANALYSIS_RESULT]
-    )
+    # Get rebalance recommendations, reusing the stored ones while the inputs are unchanged
+    key = _analysis_key()
+    if st.session_state[SESSION_KEYS.LAST_RECOMMENDATIONS_KEY] != key:
+        st.session_state[SESSION_KEYS.RECOMMENDATIONS] = _cached_recommendation(
+            st.session_state[SESSION_KEYS.PORTFOLIO],
+            st.session_state[SESSION_KEYS.ANALYSIS_RESULT]
+        )
+        st.session_state[SESSION_KEYS.LAST_RECOMMENDATIONS_KEY] = key
     
-    st.session_state[SESSION_KEYS.RECOMMENDATIONS] = recommendations
+    recommendations = st.session_state[SESSION_KEYS.RECOMMENDATIONS]
     
     col1, col2 = st.columns(2)
     
@@ -505,38 +656,122 @@ def show_recommendations_screen():
         st.subheader("Recommended Distribution")
         
         # Create recommended distribution chart
-        total_portfolio = sum(item['amount'] for item in st.session_state[SESSION_KEYS.PORTFOLIO])
-        recommended_values = []
-        recommended_labels = []
-        
+        total_portfolio = st.session_state[SESSION_KEYS.PORTFOLIO_TOTAL]
         target_allocation = st.session_state[SESSION_KEYS.ANALYSIS_RESULT]["target_allocation"]
         
-        for category, percentage in target_allocation.items():
-            value = total_portfolio * (percentage / 100)
-            recommended_values.append(value)
-            recommended_labels.append(f"{category} (${value:,.2f})")
-        
-        fig = px.pie(
-            names=recommended_labels,
-            values=recommended_values,
-            title="Recommended Investment Distribution",
-            color=list(target_allocation.keys()),
-            color_discrete_map=get_asset_category_color()
+        # Scale all target percentages at once, then label each slice with its amount
+        percentages = np.fromiter(target_allocation.values(), dtype=np.float64, count=len(target_allocation))
+        recommended_values = total_portfolio * percentages / 100
+        recommended_labels = [
+            f"{category} (${value:,.2f})"
+            for category, value in zip(target_allocation, recommended_values)
+        ]
+        
+        fig = _allocation_pie(
+            tuple(recommended_labels),
+            tuple(recommended_values.tolist()),
+            "Recommended Investment Distribution",
+            categories=tuple(target_allocation)
         )
         st.plotly_chart(fig, use_container_width=True)
     
     # Category selection for specific stocks
     st.subheader("Select a category to view investment recommendations")
     
-    categories = list(st.session_state[SESSION_KEYS.ANALYSIS_RESULT]["target_allocation"].keys())
+    categories = list(target_allocation)
     selected_category = st.selectbox("Category", categories)
     
     if selected_category:
         st.session_state[SESSION_KEYS.SELECTED_CATEGORY] = selected_category
     
     if st.button("View Investment Recommendations", use_container_width=True):
-        st.session_state[SESSION_KEYS.NAVIGATION_INDEX] = 5
-        st.rerun()
+        _goto(5)
+
+@st.fragment
+def _render_stock_table(suggested_stocks, ticker_data, selected_category):
+    """Render the suggested stocks as one table with a Select column. As a fragment, ticking a box reruns only this table"""
+    # Selected stocks are keyed by ticker, so membership is a single lookup
+    selected_stocks = st.session_state[SESSION_KEYS.SELECTED_STOCKS][selected_category]
+    
+    rows_df = pd.DataFrame([
+        {
+            "Select": stock['ticker'] in selected_stocks,
+            "Name": f"{stock['name']} ({stock['ticker']})",
+            "Description": stock['description'],
+            "Price": ticker_data.get(stock['ticker'], {}).get('current_price'),
+            "Change %": ticker_data.get(stock['ticker'], {}).get('price_change_percent'),
+            "Risk": stock.get('risk_rating', 'Medium')
+        }
+        for stock in suggested_stocks
+    ])
+    
+    edited_df = st.data_editor(
+        rows_df,
+        column_config={
+            "Select": st.column_config.CheckboxColumn("Select"),
+            "Price": st.column_config.NumberColumn("Current Price", format="$%.2f"),
+            "Change %": st.column_config.NumberColumn("Change", format="%.2f%%")
+        },
+        disabled=["Name", "Description", "Price", "Change %", "Risk"],
+        hide_index=True,
+        use_container_width=True,
+        key=f"stocks_{selected_category}"
+    )
+    
+    # Apply ticked and unticked rows to the selected stocks, keeping the selection order
+    ticked = {stock['ticker']: stock for stock, selected in zip(suggested_stocks, edited_df["Select"]) if selected}
+    if ticked.keys() != selected_stocks.keys():
+        for ticker in selected_stocks.keys() - ticked.keys():
+            del selected_stocks[ticker]
+        for ticker, stock in ticked.items():
+            if ticker not in selected_stocks:
+                selected_stocks[ticker] = {
+                    'ticker': ticker,
+                    'name': stock['name'],
+                    'price': ticker_data.get(ticker, {}).get('current_price', 0)
+                }
+
+@st.fragment
+def _render_sip_row(sip, selected_category):
+    """Render a suggested SIP row. As a fragment, its checkbox reruns only this row"""
+    code = sip['code']
+    
+    # Selected SIPs are keyed by code, so this is a single lookup
+    selected_sips = st.session_state[SESSION_KEYS.SELECTED_SIPS][selected_category]
+    is_selected = code in selected_sips
+    
+    col1, col2, col3, col4 = st.columns([2, 2, 1, 1])
+    
+    with col1:
+        st.write(f"**{sip['name']} ({code})**")
+        st.write(sip['description'])
+    
+    with col2:
+        st.write(f"Min. Investment: ₹{sip['min_investment']}")
+        st.write(f"Expense Ratio: {sip['expense_ratio']}%")
+    
+    with col3:
+        # Risk rating
+        risk_rating = sip.get('risk_rating', 'Medium')
+        st.write(f"Risk: {risk_rating}")
+    
+    with col4:
+        selected = st.checkbox("Select", value=is_selected, key=f"select_sip_{code}")
+        
+        # Nothing to update unless the checkbox changed the selection
+        if selected != is_selected:
+            if selected:
+                # Add to selected SIPs
+                selected_sips[code] = {
+                    'code': code,
+                    'name': sip['name'],
+                    'min_investment': sip['min_investment']
+                }
+            else:
+                # Remove from selected SIPs
+                del selected_sips[code]
+    
+    st.markdown("---")
 
 def show_stock_selection_screen():
     st.title("Investment Selection")
@@ -544,8 +779,7 @@ def show_stock_selection_screen():
     if not st.session_state.get(SESSION_KEYS.SELECTED_CATEGORY):
         st.warning("No category selected. Please go back and select a category.")
         if st.button("Back to Recommendations"):
-            st.session_state[SESSION_KEYS.NAVIGATION_INDEX] = 4
-            st.rerun()
+            _goto(4)
         return
     
     selected_category = st.session_state[SESSION_KEYS.SELECTED_CATEGORY]
@@ -558,72 +792,17 @@ def show_stock_selection_screen():
         st.subheader(f"Recommended {selected_category} Stocks/ETFs")
         
         # Get stock suggestions for the selected category
-        suggested_stocks = get_stock_suggestions(selected_category, market)
-        
-        # Initialize selected stocks if not already in session
-        if SESSION_KEYS.SELECTED_STOCKS not in st.session_state:
-            st.session_state[SESSION_KEYS.SELECTED_STOCKS] = {}
+        suggested_stocks = _cached_suggestions(selected_category, market)
         
-        # Make sure the category exists in selected stocks
-        if selected_category not in st.session_state[SESSION_KEYS.SELECTED_STOCKS]:
-            st.session_state[SESSION_KEYS.SELECTED_STOCKS][selected_category] = []
+        # Make sure the category exists in selected stocks (a dict of ticker -> stock, in selection order)
+        st.session_state[SESSION_KEYS.SELECTED_STOCKS].setdefault(selected_category, {})
         
         # Get stock data
         if suggested_stocks:
-            ticker_data = fetch_stock_data([stock['ticker'] for stock in suggested_stocks])
+            ticker_data = _get_ticker_data(stock['ticker'] for stock in suggested_stocks)
             
             # Display the stock choices
-            stock_selections = []
-            
-            for stock in suggested_stocks:
-                ticker = stock['ticker']
-                data = ticker_data.get(ticker, {})
-                
-                # Check if already selected
-                is_selected = any(s['ticker'] == ticker for s in st.session_state[SESSION_KEYS.SELECTED_STOCKS].get(selected_category, []))
-                
-                col1, col2, col3, col4 = st.columns([2, 2, 1, 1])
-                
-                with col1:
-                    st.write(f"**{stock['name']} ({ticker})**")
-                    st.write(stock['description'])
-                
-                with col2:
-                    if data:
-                        st.write(f"Current Price: ${data.get('current_price', 'N/A')}")
-                        change = data.get('price_change_percent', 0)
-                        if change > 0:
-                            st.write(f"Change: 📈 +{change:.2f}%")
-                        else:
-                            st.write(f"Change: 📉 {change:.2f}%")
-                    else:
-                        st.write("Price data unavailable")
-                
-                with col3:
-                    # Calculate the risk rating based on volatility or other factors
-                    risk_rating = stock.get('risk_rating', 'Medium')
-                    st.write(f"Risk: {risk_rating}")
-                
-                with col4:
-                    selected = st.checkbox("Select", value=is_selected, key=f"select_{ticker}")
-                    
-                    if selected:
-                        if not is_selected:
-                            # Add to selected stocks
-                            st.session_state[SESSION_KEYS.SELECTED_STOCKS][selected_category].append({
-                                'ticker': ticker,
-                                'name': stock['name'],
-                                'price': data.get('current_price', 0) if data else 0
-                            })
-                    else:
-                        if is_selected:
-                            # Remove from selected stocks
-                            st.session_state[SESSION_KEYS.SELECTED_STOCKS][selected_category] = [
-                                s for s in st.session_state[SESSION_KEYS.SELECTED_STOCKS][selected_category]
-                                if s['ticker'] != ticker
-                            ]
-                
-                st.markdown("---")
+            _render_stock_table(suggested_stocks, ticker_data, selected_category)
         else:
             st.info(f"No stock suggestions available for {selected_category} in the {market} market.")
     
@@ -633,64 +812,19 @@ def show_stock_selection_screen():
         # Get SIP suggestions for the selected category
         suggested_sips = get_sip_suggestions(selected_category, market)
         
-        # Initialize selected SIPs if not already in session
-        if SESSION_KEYS.SELECTED_SIPS not in st.session_state:
-            st.session_state[SESSION_KEYS.SELECTED_SIPS] = {}
-        
-        # Make sure the category exists in selected SIPs
-        if selected_category not in st.session_state[SESSION_KEYS.SELECTED_SIPS]:
-            st.session_state[SESSION_KEYS.SELECTED_SIPS][selected_category] = []
+        # Make sure the category exists in selected SIPs (a dict of code -> SIP, in selection order)
+        st.session_state[SESSION_KEYS.SELECTED_SIPS].setdefault(selected_category, {})
         
         # Display the SIP choices
         if suggested_sips:
             for sip in suggested_sips:
-                code = sip['code']
-                
-                # Check if already selected
-                is_selected = any(s['code'] == code for s in st.session_state[SESSION_KEYS.SELECTED_SIPS].get(selected_category, []))
-                
-                col1, col2, col3, col4 = st.columns([2, 2, 1, 1])
-                
-                with col1:
-                    st.write(f"**{sip['name']} ({code})**")
-                    st.write(sip['description'])
-                
-                with col2:
-                    st.write(f"Min. Investment: ₹{sip['min_investment']}")
-                    st.write(f"Expense Ratio: {sip['expense_ratio']}%")
-                
-                with col3:
-                    # Risk rating
-                    risk_rating = sip.get('risk_rating', 'Medium')
-                    st.write(f"Risk: {risk_rating}")
-                
-                with col4:
-                    selected = st.checkbox("Select", value=is_selected, key=f"select_sip_{code}")
-                    
-                    if selected:
-                        if not is_selected:
-                            # Add to selected SIPs
-                            st.session_state[SESSION_KEYS.SELECTED_SIPS][selected_category].append({
-                                'code': code,
-                                'name': sip['name'],
-                                'min_investment': sip['min_investment']
-                            })
-                    else:
-                        if is_selected:
-                            # Remove from selected SIPs
-                            st.session_state[SESSION_KEYS.SELECTED_SIPS][selected_category] = [
-                                s for s in st.session_state[SESSION_KEYS.SELECTED_SIPS][selected_category]
-                                if s['code'] != code
-                            ]
-                
-                st.markdown("---")
+                _render_sip_row(sip, selected_category)
         else:
             st.info(f"No SIP suggestions available for {selected_category} in the {market} market.")
     
     # Continue button
     if st.button("Continue to Summary", use_container_width=True):
-        st.session_state[SESSION_KEYS.NAVIGATION_INDEX] = 6
-        st.rerun()
+        _goto(6)
 
 def show_summary_screen():
     st.title("Investment Summary")
@@ -718,7 +852,7 @@ def show_summary_screen():
                 selected_stocks_exists = True
                 st.write(f"**{category}**")
                 
-                for stock in stocks:
+                for stock in stocks.values():
                     st.write(f"- {stock['name']} ({stock['ticker']})")
                 
                 st.markdown("---")
@@ -736,7 +870,7 @@ def show_summary_screen():
                 selected_sips_exists = True
                 st.write(f"**{category}**")
                 
-                for sip in sips:
+                for sip in sips.values():
                     st.write(f"- {sip['name']} (Min: ₹{sip['min_investment']})")
                 
                 st.markdown("---")
@@ -764,42 +898,21 @@ def show_summary_screen():
     # Final notes and recommendations
     st.subheader("Next Steps")
     
-    st.markdown("""
-    ### Implementing Your Investment Plan:
-    
-    1. **For Stocks/ETFs:**
-       - Open a brokerage account if you don't have one
-       - Place orders for the selected stocks in the recommended proportions
-       - Consider dollar-cost averaging for large investments
-    
-    2. **For SIPs:**
-       - Set up systematic investment plans with the selected mutual funds
-       - Choose a convenient date for monthly debits
-       - Consider dividing your monthly investment across multiple funds
-    
-    3. **Portfolio Maintenance:**
-       - Review your portfolio quarterly
-       - Rebalance annually or when allocation drifts more than 5% from targets
-       - Consider tax implications when selling investments
-    """)
+    st.markdown(_NEXT_STEPS_MD)
     
     # Download report option
     if st.button("Start Over", use_container_width=True):
-        # Reset session state (keeping risk profile)
-        risk_profile = st.session_state[SESSION_KEYS.RISK_PROFILE]
-        market = st.session_state[SESSION_KEYS.MARKET]
-        
-        st.session_state[SESSION_KEYS.PORTFOLIO] = []
-        st.session_state[SESSION_KEYS.ANALYSIS_RESULT] = None
-        st.session_state[SESSION_KEYS.RECOMMENDATIONS] = None
-        st.session_state[SESSION_KEYS.SELECTED_CATEGORY] = None
-        st.session_state[SESSION_KEYS.SELECTED_STOCKS] = {}
-        st.session_state[SESSION_KEYS.SELECTED_SIPS] = {}
-        st.session_state[SESSION_KEYS.RISK_PROFILE] = risk_profile
-        st.session_state[SESSION_KEYS.MARKET] = market
-        st.session_state[SESSION_KEYS.NAVIGATION_INDEX] = 0
-        
-        st.rerun()
+        # Reset session state (keeping risk profile and market)
+        _set_portfolio([])
+        _goto(0, {
+            SESSION_KEYS.ANALYSIS_RESULT: None,
+            SESSION_KEYS.LAST_ANALYSIS_KEY: None,
+            SESSION_KEYS.RECOMMENDATIONS: None,
+            SESSION_KEYS.LAST_RECOMMENDATIONS_KEY: None,
+            SESSION_KEYS.SELECTED_CATEGORY: None,
+            SESSION_KEYS.SELECTED_STOCKS: {},
+            SESSION_KEYS.SELECTED_SIPS: {}
+        })
 
 def show_login_screen():
     st.title("Login to PortaAi")
@@ -952,8 +1065,7 @@ def show_portfolio_management_screen():
                     # Load the selected portfolio
                     load_portfolio_from_database(selected_portfolio_id)
                     st.success("Portfolio loaded successfully!")
-                    st.session_state[SESSION_KEYS.NAVIGATION_INDEX] = 2  # Go to portfolio input screen
-                    st.rerun()
+                    _goto(2)  # Go to portfolio input screen
                 
                 if st.button("Delete Selected Portfolio", type="secondary"):
                     # Delete confirmation
@@ -990,7 +1102,7 @@ def show_portfolio_management_screen():
                     st.session_state[SESSION_KEYS.MARKET] = portfolio_market
                     
                     # Clear current portfolio data
-                    st.session_state[SESSION_KEYS.PORTFOLIO] = []
+                    _set_portfolio([])
                     
                     st.success("Portfolio created successfully!")
                     st.rerun()
@@ -1024,8 +1136,7 @@ def show_portfolio_management_screen():
                 """)
                 
                 if st.button("View AI Recommendations", key="ai_rec_button"):
-                    st.session_state[SESSION_KEYS.NAVIGATION_INDEX] = 10
-                    st.rerun()
+                    _goto(10)
         
         with col2:
             with st.expander("Tax Optimization", expanded=True):
@@ -1042,8 +1153,7 @@ def show_portfolio_management_screen():
                 """)
                 
                 if st.button("View Tax Strategies", key="tax_opt_button"):
-                    st.session_state[SESSION_KEYS.NAVIGATION_INDEX] = 11
-                    st.rerun()
+                    _goto(11)
 
 def load_portfolio_from_database(portfolio_id):
     """Load a portfolio from the database into the session state"""
@@ -1083,7 +1193,7 @@ def load_portfolio_from_database(portfolio_id):
             
         portfolio_items.append(item)
     
-    st.session_state[SESSION_KEYS.PORTFOLIO] = portfolio_items
+    _set_portfolio(portfolio_items)
     
     # Get user risk profile if not already set
     if not st.session_state[SESSION_KEYS.RISK_PROFILE]:
@@ -1103,8 +1213,7 @@ def show_financial_goals_screen():
     if not st.session_state[SESSION_KEYS.IS_LOGGED_IN]:
         st.warning("Please login to use the financial goals feature")
         if st.button("Go to Login"):
-            st.session_state[SESSION_KEYS.NAVIGATION_INDEX] = 0
-            st.rerun()
+            _goto(0)
         return
     
     # Create tabs for different sections
@@ -1223,8 +1332,7 @@ def show_financial_goals_screen():
             st.warning("You don't have any financial goals yet. Create a goal first to use this feature.")
             if st.button("Create a New Goal"):
                 # Switch to the Create New Goal tab
-                st.session_state[SESSION_KEYS.NAVIGATION_INDEX] = 3
-                st.rerun()
+                _goto(3)
         else:
             # Goal selection
             goal_options = {f"{goal.name} (${goal.target_amount:,.0f}, {goal.timeline_years} years)": goal.id for goal in user_goals}
@@ -1301,14 +1409,12 @@ def show_financial_goals_screen():
                 
                 with col2:
                     # Display allocation chart
-                    fig = px.pie(
-                        names=list(allocation.keys()),
-                        values=list(allocation.values()),
-                        title="Recommended Portfolio Allocation",
-                        color=list(allocation.keys()),
-                        color_discrete_map=get_asset_category_color()
+                    fig = _allocation_pie(
+                        tuple(allocation),
+                        tuple(allocation.values()),
+                        "Recommended Portfolio Allocation",
+                        compact=True
                     )
-                    fig.update_layout(margin=dict(l=0, r=0, t=40, b=0))
                     st.plotly_chart(fig, use_container_width=True)
                 
                 # Display detailed allocation strategy
@@ -1393,7 +1499,7 @@ def show_financial_goals_screen():
                                     })
                                 
                                 # Set in session state
-                                st.session_state[SESSION_KEYS.PORTFOLIO] = portfolio_items
+                                _set_portfolio(portfolio_items)
                                 
                                 # Save to database
                                 save_current_portfolio_to_database()
@@ -1402,8 +1508,7 @@ def show_financial_goals_screen():
                                 
                                 # Provide option to go to portfolio management
                                 if st.button("Go to Portfolio Management"):
-                                    st.session_state[SESSION_KEYS.NAVIGATION_INDEX] = 4  # Portfolio management screen
-                                    st.rerun()
+                                    _goto(4)  # Portfolio management screen
                             else:
                                 st.error("Failed to create portfolio")
                         except Exception as e:
@@ -1486,8 +1591,7 @@ def show_price_alerts_screen():
     if not st.session_state[SESSION_KEYS.IS_LOGGED_IN]:
         st.warning("Please log in to use the price alerts feature.")
         if st.button("Go to Login"):
-            st.session_state[SESSION_KEYS.NAVIGATION_INDEX] = 7  # Navigate to login screen
-            st.rerun()
+            _goto(7)  # Navigate to login screen
         return
     
     st.markdown("""
@@ -1515,7 +1619,7 @@ def show_price_alerts_screen():
             current_price = None
             if ticker:
                 try:
-                    price_data = fetch_stock_data([ticker])
+                    price_data = _cached_prices((ticker,))
                     if ticker in price_data:
                         current_price = price_data[ticker]['current_price']
                         st.info(f"Current price of {ticker}: ${current_price:.2f}")
@@ -1584,8 +1688,7 @@ def show_price_alerts_screen():
                 st.info("You don't have any price alerts yet. Create one in the 'Create New Alert' tab.")
             else:
                 # Fetch current prices for all tickers
-                tickers = [alert.ticker for alert in alerts]
-                current_prices = fetch_stock_data(tickers)
+                current_prices = _cached_prices(tuple(sorted({alert.ticker for alert in alerts})))
                 
                 # Display alerts in a table
                 for alert in alerts:
@@ -1675,13 +1778,11 @@ def show_price_alerts_screen():
     
     with col1:
         if st.button("Back to Portfolio Management", use_container_width=True):
-            st.session_state[SESSION_KEYS.NAVIGATION_INDEX] = 7
-            st.rerun()
+            _goto(7)
     
     with col2:
         if st.button("View Financial Goals", use_container_width=True):
-            st.session_state[SESSION_KEYS.NAVIGATION_INDEX] = 8
-            st.rerun()
+            _goto(8)
     
     # Check if Twilio credentials are set
     twilio_ready = all([
@@ -1707,8 +1808,7 @@ def show_ai_recommendations_screen():
     if not st.session_state[SESSION_KEYS.PORTFOLIO]:
         st.warning("No portfolio data available. Please go back and add your investments.")
         if st.button("Back to Portfolio Input"):
-            st.session_state[SESSION_KEYS.NAVIGATION_INDEX] = 2
-            st.rerun()
+            _goto(2)
         return
     
     st.markdown("""
@@ -1730,12 +1830,13 @@ def show_ai_recommendations_screen():
                 # Get financial goals if available
                 financial_goals = st.session_state.get(SESSION_KEYS.FINANCIAL_GOALS, [])
                 
-                # Generate AI recommendations
+                # Generate AI recommendations, showing the response as it streams in
                 recommendations = generate_investment_recommendations(
                     st.session_state[SESSION_KEYS.PORTFOLIO],
                     st.session_state[SESSION_KEYS.RISK_PROFILE],
                     st.session_state[SESSION_KEYS.MARKET],
-                    financial_goals
+                    financial_goals,
+                    on_chunk=_stream_preview(st.empty())
                 )
                 
                 # Store in session state
@@ -1748,16 +1849,36 @@ def show_ai_recommendations_screen():
         
         if st.button("Generate SWOT Analysis", use_container_width=True):
             with st.spinner("Performing SWOT analysis of your portfolio..."):
-                # Generate SWOT analysis
+                # Generate SWOT analysis, showing the response as it streams in
                 swot = analyze_portfolio_strengths_weaknesses(
                     st.session_state[SESSION_KEYS.PORTFOLIO],
-                    st.session_state[SESSION_KEYS.RISK_PROFILE]
+                    st.session_state[SESSION_KEYS.RISK_PROFILE],
+                    on_chunk=_stream_preview(st.empty())
                 )
                 
                 # Store in session state
                 st.session_state[SESSION_KEYS.PORTFOLIO_SWOT] = swot
                 st.rerun()
     
+    if st.button("Generate Full AI Report", use_container_width=True):
+        with st.spinner("Generating recommendations, SWOT analysis and tax advice..."):
+            # Request all three AI analyses together, showing the response as it streams in.
+            # If the combined response is unusable, the separate fallback requests don't
+            # stream, so only the spinner shows while they run
+            recommendations, tax_advice, swot = generate_full_report(
+                st.session_state[SESSION_KEYS.PORTFOLIO],
+                st.session_state[SESSION_KEYS.RISK_PROFILE],
+                st.session_state[SESSION_KEYS.MARKET],
+                st.session_state.get(SESSION_KEYS.FINANCIAL_GOALS, []),
+                on_chunk=_stream_preview(st.empty())
+            )
+            
+            # Store in session state
+            st.session_state[SESSION_KEYS.AI_RECOMMENDATIONS] = recommendations
+            st.session_state[SESSION_KEYS.PORTFOLIO_SWOT] = swot
+            st.session_state[SESSION_KEYS.TAX_OPTIMIZATION] = tax_advice
+            st.rerun()
+    
     # Display AI recommendations if available
     if st.session_state[SESSION_KEYS.AI_RECOMMENDATIONS]:
         st.header("AI Investment Recommendations")
@@ -1826,13 +1947,11 @@ def show_ai_recommendations_screen():
     
     with col1:
         if st.button("Back to Analysis", use_container_width=True):
-            st.session_state[SESSION_KEYS.NAVIGATION_INDEX] = 3
-            st.rerun()
+            _goto(3)
     
     with col3:
         if st.button("View Tax Optimization", use_container_width=True):
-            st.session_state[SESSION_KEYS.NAVIGATION_INDEX] = 11
-            st.rerun()
+            _goto(11)
 
 def show_tax_optimization_screen():
     st.title("Tax Optimization")
@@ -1841,8 +1960,7 @@ def show_tax_optimization_screen():
     if not st.session_state[SESSION_KEYS.PORTFOLIO]:
         st.warning("No portfolio data available. Please go back and add your investments.")
         if st.button("Back to Portfolio Input"):
-            st.session_state[SESSION_KEYS.NAVIGATION_INDEX] = 2
-            st.rerun()
+            _goto(2)
         return
     
     st.markdown("""
@@ -1861,10 +1979,11 @@ def show_tax_optimization_screen():
     
     if st.button("Generate Tax Optimization Advice", use_container_width=True):
         with st.spinner("Analyzing your portfolio for tax efficiency..."):
-            # Generate tax optimization advice
+            # Generate tax optimization advice, showing the response as it streams in
             tax_advice = generate_tax_optimization_advice(
                 st.session_state[SESSION_KEYS.PORTFOLIO],
-                country
+                country,
+                on_chunk=_stream_preview(st.empty())
             )
             
             # Store in session state
@@ -1943,13 +2062,11 @@ def show_tax_optimization_screen():
     
     with col1:
         if st.button("Back to AI Recommendations", use_container_width=True):
-            st.session_state[SESSION_KEYS.NAVIGATION_INDEX] = 10
-            st.rerun()
+            _goto(10)
     
     with col3:
         if st.button("Back to Portfolio Management", use_container_width=True):
-            st.session_state[SESSION_KEYS.NAVIGATION_INDEX] = 7
-            st.rerun()
+            _goto(7)
     
 def show_advanced_analytics_screen():
     st.title("Advanced Portfolio Analytics")
@@ -1958,17 +2075,42 @@ def show_advanced_analytics_screen():
     if not st.session_state[SESSION_KEYS.IS_LOGGED_IN]:
         st.warning("Please log in to access Advanced Analytics features.")
         if st.button("Go to Login"):
-            st.session_state[SESSION_KEYS.NAVIGATION_INDEX] = 0
-            st.rerun()
+            _goto(0)
         return
     
     if not st.session_state[SESSION_KEYS.PORTFOLIO]:
         st.warning("No portfolio data available. Please create a portfolio first.")
         if st.button("Go to Portfolio Input"):
-            st.session_state[SESSION_KEYS.NAVIGATION_INDEX] = 2
-            st.rerun()
+            _goto(2)
         return
     
+    # Compute every analysis missing from session in one concurrent batch
+    # rather than one tab at a time
+    analytics_keys = {
+        "prediction": SESSION_KEYS.PORTFOLIO_PERFORMANCE_PREDICTION,
+        "sector_analysis": SESSION_KEYS.SECTOR_ANALYSIS,
+        "scenario_analysis": SESSION_KEYS.ECONOMIC_SCENARIO_ANALYSIS,
+        "mpt_metrics": SESSION_KEYS.MPT_METRICS,
+        "ai_insights": SESSION_KEYS.AI_PORTFOLIO_INSIGHTS
+    }
+    missing_analytics = [name for name, key in analytics_keys.items() if not st.session_state[key]]
+    
+    if missing_analytics:
+        time_horizon = st.session_state.get("last_prediction_horizon", 5)
+        with st.spinner("Running portfolio analytics..."):
+            analytics = run_all_analytics(
+                st.session_state[SESSION_KEYS.PORTFOLIO],
+                st.session_state[SESSION_KEYS.RISK_PROFILE],
+                time_horizon_years=time_horizon,
+                analyses=missing_analytics
+            )
+        for name, analysis in analytics.items():
+            st.session_state[analytics_keys[name]] = analysis
+        if "prediction" in analytics:
+            st.session_state["last_prediction_horizon"] = time_horizon
+        if "scenario_analysis" in analytics:
+            st.session_state["last_scenario_horizon"] = time_horizon
+    
     # Add analytics selector
     analytics_tabs = st.tabs([
         "Performance Prediction", 
@@ -2019,7 +2161,7 @@ def show_advanced_analytics_screen():
             col1, col2, col3 = st.columns(3)
             
             with col1:
-                current_value = sum(item['amount'] for item in st.session_state[SESSION_KEYS.PORTFOLIO])
+                current_value = st.session_state[SESSION_KEYS.PORTFOLIO_TOTAL]
                 st.metric("Current Value", f"${current_value:,.2f}")
             
             with col2:
@@ -2152,7 +2294,8 @@ def show_advanced_analytics_screen():
             with st.spinner("Calculating portfolio metrics..."):
                 # Call MPT metrics function from advanced_analytics.py
                 mpt_metrics = calculate_modern_portfolio_theory_metrics(
-                    st.session_state[SESSION_KEYS.PORTFOLIO]
+                    st.session_state[SESSION_KEYS.PORTFOLIO],
+                    return_chart=True
                 )
                 st.session_state[SESSION_KEYS.MPT_METRICS] = mpt_metrics
         
@@ -2169,13 +2312,14 @@ def show_advanced_analytics_screen():
                     st.metric("Sharpe Ratio", f"{metrics['sharpe_ratio']:.2f}",
                              metrics.get('sharpe_ratio_context', ''))
                 
+                # Beta, alpha and R-squared are None when the metrics weren't computed against the market
                 with col2:
-                    st.metric("Beta", f"{metrics['beta']:.2f}",
-                             metrics.get('beta_context', ''))
+                    st.metric("Beta", _format_metric(metrics['beta']),
+                             metrics.get('beta_context') or '')
                 
                 with col3:
-                    st.metric("Alpha (Annual)", f"{metrics['alpha']:.2f}%",
-                             metrics.get('alpha_context', ''))
+                    st.metric("Alpha (Annual)", _format_metric(metrics['alpha'], "%"),
+                             metrics.get('alpha_context') or '')
                 
                 # Second row of metrics
                 col1, col2, col3 = st.columns(3)
@@ -2185,8 +2329,8 @@ def show_advanced_analytics_screen():
                              metrics.get('std_dev_context', ''))
                 
                 with col2:
-                    st.metric("R-Squared", f"{metrics['r_squared']:.2f}",
-                             metrics.get('r_squared_context', ''))
+                    st.metric("R-Squared", _format_metric(metrics['r_squared']),
+                             metrics.get('r_squared_context') or '')
                 
                 with col3:
                     st.metric("Max Drawdown", f"{metrics['max_drawdown']:.2f}%",
@@ -2216,11 +2360,15 @@ def show_advanced_analytics_screen():
         # Check if AI insights are in session
         if not st.session_state[SESSION_KEYS.AI_PORTFOLIO_INSIGHTS]:
             with st.spinner("Generating AI insights..."):
-                # Call AI insights function from advanced_analytics.py
+                # Call AI insights function from advanced_analytics.py, showing the
+                # response as it streams in until the formatted insights replace it
+                preview = st.empty()
                 ai_insights = get_ai_portfolio_insights(
                     st.session_state[SESSION_KEYS.PORTFOLIO],
-                    st.session_state[SESSION_KEYS.RISK_PROFILE]
+                    st.session_state[SESSION_KEYS.RISK_PROFILE],
+                    on_chunk=_stream_preview(preview)
                 )
+                preview.empty()
                 st.session_state[SESSION_KEYS.AI_PORTFOLIO_INSIGHTS] = ai_insights
         
         ai_insights = st.session_state[SESSION_KEYS.AI_PORTFOLIO_INSIGHTS]
@@ -2294,13 +2442,28 @@ def show_advanced_analytics_screen():
     
     with col1:
         if st.button("Back to Portfolio Management", use_container_width=True):
-            st.session_state[SESSION_KEYS.NAVIGATION_INDEX] = 7
-            st.rerun()
+            _goto(7)
     
     with col2:
         if st.button("Back to Tax Optimization", use_container_width=True):
-            st.session_state[SESSION_KEYS.NAVIGATION_INDEX] = 11
-            st.rerun()
+            _goto(11)
+
+# Screen for each NAVIGATION_INDEX, in _NAV_OPTIONS order
+_SCREENS = (
+    show_welcome_screen,
+    show_risk_profile_screen,
+    show_portfolio_input_screen,
+    show_portfolio_analysis_screen,
+    show_recommendations_screen,
+    show_stock_selection_screen,
+    show_summary_screen,
+    show_portfolio_management_screen,
+    show_financial_goals_screen,
+    show_price_alerts_screen,
+    show_ai_recommendations_screen,
+    show_tax_optimization_screen,
+    show_advanced_analytics_screen
+)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
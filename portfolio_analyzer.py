@@ -19,22 +19,12 @@ def analyze_portfolio(portfolio, risk_profile):
             "insights": [{"type": "info", "message": "Add investments to analyze your portfolio."}]
         }
     
-    # Calculate current allocation percentages
-    total_investment = sum(item['amount'] for item in portfolio)
+    # Group by category in a single pass, keeping the order categories first appear in
+    category_totals = pd.DataFrame(portfolio).groupby('category', sort=False)['amount'].sum()
     
-    # Group by category
-    current_allocation = {}
-    for item in portfolio:
-        category = item['category']
-        if category not in current_allocation:
-            current_allocation[category] = 0
-        current_allocation[category] += item['amount']
-    
-    # Convert to percentages
-    current_allocation_pct = {
-        category: (amount / total_investment) * 100 
-        for category, amount in current_allocation.items()
-    }
+    # Calculate current allocation percentages
+    total_investment = float(category_totals.sum())
+    current_allocation_pct = (category_totals / total_investment * 100).to_dict()
     
     # Get target allocation for the selected risk profile
     target_allocation = get_risk_profile_allocation(risk_profile)
@@ -0,0 +1,70 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+pytest.importorskip("yfinance")
+pytest.importorskip("openai")
+
+import advanced_analytics
+from advanced_analytics import RiskMetrics, calculate_modern_portfolio_theory_metrics
+
+
+def _fake_prices(tickers, start, end):
+    rng = np.random.default_rng(0)
+    index = pd.bdate_range(start, end)
+    returns = rng.normal(0.0005, 0.01, size=(len(index), len(tickers)))
+    return pd.DataFrame(100 * np.cumprod(1 + returns, axis=0), index=index, columns=list(tickers))
+
+
+def test_risk_metrics_to_dict_without_market_relative():
+    metrics = RiskMetrics(["A"], np.array([0.1]), np.array([0.2]), None, None)
+    assert metrics.to_dict() == {
+        "A": {"annualized_return": 0.1, "annualized_volatility": 0.2, "beta": None, "alpha": None}
+    }
+
+
+def test_mpt_metrics_without_market_relative(monkeypatch):
+    monkeypatch.setattr(advanced_analytics, "_download_close_prices", _fake_prices)
+    portfolio = [
+        {"name": "A", "ticker": "A", "category": "Large Cap", "amount": 600},
+        {"name": "B", "ticker": "B", "category": "Mid Cap", "amount": 400},
+    ]
+
+    result = calculate_modern_portfolio_theory_metrics(portfolio, compute_market_relative=False, seed=0)
+
+    assert "error" not in result
+    assert result["sharpe_ratio"] is not None
+    for key in ("beta", "alpha", "r_squared", "treynor_ratio"):
+        assert result[key] is None
+        assert result["key_metrics"].get(key) is None
+    assert all(
+        metrics["beta"] is None and metrics["alpha"] is None
+        for metrics in result["risk_metrics"].to_dict().values()
+    )
+    assert set(result["interpretation"]) == {"Sharpe Ratio", "Standard Deviation"}
+
+
+def test_mpt_metrics_empty_portfolio():
+    result = calculate_modern_portfolio_theory_metrics([])
+
+    assert "error" in result
+    assert result["risk_metrics"] is None
+    assert result["efficient_frontier"] is None
+
+
+def test_mpt_metrics_single_ticker(monkeypatch):
+    class _NoSampling:
+        def random(self, *args, **kwargs):
+            raise AssertionError("frontier portfolios sampled for a single ticker")
+
+    monkeypatch.setattr(advanced_analytics, "_download_close_prices", _fake_prices)
+    monkeypatch.setattr(advanced_analytics, "_rng", _NoSampling())
+    portfolio = [{"name": "A", "ticker": "A", "category": "Large Cap", "amount": 1000}]
+
+    result = calculate_modern_portfolio_theory_metrics(portfolio)
+
+    assert "error" not in result
+    assert len(result["efficient_frontier"]) == 1
+    assert result["efficient_frontier"][0]["is_current"] is True
+    assert np.isfinite(result["sharpe_ratio"])
+    assert np.isfinite(result["portfolio_volatility"])
@@ -2,12 +2,19 @@ class SESSION_KEYS:
     NAVIGATION_INDEX = "navigation_index"
     RISK_PROFILE = "risk_profile"
     PORTFOLIO = "portfolio"
+    PORTFOLIO_TOTAL = "portfolio_total"
+    PORTFOLIO_DF = "portfolio_df"
+    PORTFOLIO_FLASH = "portfolio_flash"
     ANALYSIS_RESULT = "analysis_result"
+    LAST_ANALYSIS_KEY = "last_analysis_key"
     RECOMMENDATIONS = "recommendations"
+    LAST_RECOMMENDATIONS_KEY = "last_recommendations_key"
     SELECTED_CATEGORY = "selected_category"
     SELECTED_STOCKS = "selected_stocks"
     SELECTED_SIPS = "selected_sips"
     MARKET = "market"
+    TICKER_DATA = "ticker_data"
+    TICKER_DATA_FETCHED_AT = "ticker_data_fetched_at"
     
     # Financial goals related keys
     FINANCIAL_GOALS = "financial_goals"
@@ -46,99 +53,103 @@ def initialize_session_state():
     Initialize session state variables if they don't exist.
     """
     # Navigation and UI state
-    if SESSION_KEYS.NAVIGATION_INDEX not in st.session_state:
-        st.session_state[SESSION_KEYS.NAVIGATION_INDEX] = 0
+    st.session_state.setdefault(SESSION_KEYS.NAVIGATION_INDEX, 0)
+    st.session_state.setdefault(SESSION_KEYS.RISK_PROFILE, "")
+    st.session_state.setdefault(SESSION_KEYS.PORTFOLIO, [])
     
-    if SESSION_KEYS.RISK_PROFILE not in st.session_state:
-        st.session_state[SESSION_KEYS.RISK_PROFILE] = ""
+    # Running total of the portfolio amounts, kept in step with every portfolio change
+    if SESSION_KEYS.PORTFOLIO_TOTAL not in st.session_state:
+        st.session_state[SESSION_KEYS.PORTFOLIO_TOTAL] = sum(item['amount'] for item in st.session_state[SESSION_KEYS.PORTFOLIO])
     
-    if SESSION_KEYS.PORTFOLIO not in st.session_state:
-        st.session_state[SESSION_KEYS.PORTFOLIO] = []
+    # Columnar copy of the portfolio for display and aggregation, kept in step with the list
+    if SESSION_KEYS.PORTFOLIO_DF not in st.session_state:
+        st.session_state[SESSION_KEYS.PORTFOLIO_DF] = build_portfolio_frame(st.session_state[SESSION_KEYS.PORTFOLIO])
     
-    if SESSION_KEYS.ANALYSIS_RESULT not in st.session_state:
-        st.session_state[SESSION_KEYS.ANALYSIS_RESULT] = None
+    # Confirmation message left by a portfolio input callback for the screen to show
+    st.session_state.setdefault(SESSION_KEYS.PORTFOLIO_FLASH, None)
     
-    if SESSION_KEYS.RECOMMENDATIONS not in st.session_state:
-        st.session_state[SESSION_KEYS.RECOMMENDATIONS] = None
+    st.session_state.setdefault(SESSION_KEYS.ANALYSIS_RESULT, None)
+    st.session_state.setdefault(SESSION_KEYS.RECOMMENDATIONS, None)
     
-    if SESSION_KEYS.SELECTED_CATEGORY not in st.session_state:
-        st.session_state[SESSION_KEYS.SELECTED_CATEGORY] = None
+    # Inputs the stored analysis and recommendations were computed from
+    st.session_state.setdefault(SESSION_KEYS.LAST_ANALYSIS_KEY, None)
+    st.session_state.setdefault(SESSION_KEYS.LAST_RECOMMENDATIONS_KEY, None)
     
-    if SESSION_KEYS.SELECTED_STOCKS not in st.session_state:
-        st.session_state[SESSION_KEYS.SELECTED_STOCKS] = {}
-        
-    if SESSION_KEYS.SELECTED_SIPS not in st.session_state:
-        st.session_state[SESSION_KEYS.SELECTED_SIPS] = {}
-        
-    if SESSION_KEYS.MARKET not in st.session_state:
-        st.session_state[SESSION_KEYS.MARKET] = "INDIA"
+    st.session_state.setdefault(SESSION_KEYS.SELECTED_CATEGORY, None)
+    st.session_state.setdefault(SESSION_KEYS.SELECTED_STOCKS, {})
+    st.session_state.setdefault(SESSION_KEYS.SELECTED_SIPS, {})
+    st.session_state.setdefault(SESSION_KEYS.MARKET, "INDIA")
+    st.session_state.setdefault(SESSION_KEYS.TICKER_DATA, {})
+    st.session_state.setdefault(SESSION_KEYS.TICKER_DATA_FETCHED_AT, {})
     
     # User and authentication state
-    if SESSION_KEYS.USER_ID not in st.session_state:
-        st.session_state[SESSION_KEYS.USER_ID] = None
-        
-    if SESSION_KEYS.USER_NAME not in st.session_state:
-        st.session_state[SESSION_KEYS.USER_NAME] = None
-        
-    if SESSION_KEYS.USER_EMAIL not in st.session_state:
-        st.session_state[SESSION_KEYS.USER_EMAIL] = None
-        
-    if SESSION_KEYS.IS_LOGGED_IN not in st.session_state:
-        st.session_state[SESSION_KEYS.IS_LOGGED_IN] = False
+    st.session_state.setdefault(SESSION_KEYS.USER_ID, None)
+    st.session_state.setdefault(SESSION_KEYS.USER_NAME, None)
+    st.session_state.setdefault(SESSION_KEYS.USER_EMAIL, None)
+    st.session_state.setdefault(SESSION_KEYS.IS_LOGGED_IN, False)
         
     # Portfolio database state
-    if SESSION_KEYS.CURRENT_PORTFOLIO_ID not in st.session_state:
-        st.session_state[SESSION_KEYS.CURRENT_PORTFOLIO_ID] = None
-        
-    if SESSION_KEYS.CURRENT_PORTFOLIO_NAME not in st.session_state:
-        st.session_state[SESSION_KEYS.CURRENT_PORTFOLIO_NAME] = None
-        
-    if SESSION_KEYS.USER_PORTFOLIOS not in st.session_state:
-        st.session_state[SESSION_KEYS.USER_PORTFOLIOS] = []
+    st.session_state.setdefault(SESSION_KEYS.CURRENT_PORTFOLIO_ID, None)
+    st.session_state.setdefault(SESSION_KEYS.CURRENT_PORTFOLIO_NAME, None)
+    st.session_state.setdefault(SESSION_KEYS.USER_PORTFOLIOS, [])
     
     # Financial goals state
-    if SESSION_KEYS.FINANCIAL_GOALS not in st.session_state:
-        st.session_state[SESSION_KEYS.FINANCIAL_GOALS] = []
-        
-    if SESSION_KEYS.CURRENT_GOAL_ID not in st.session_state:
-        st.session_state[SESSION_KEYS.CURRENT_GOAL_ID] = None
-        
-    if SESSION_KEYS.CURRENT_GOAL_NAME not in st.session_state:
-        st.session_state[SESSION_KEYS.CURRENT_GOAL_NAME] = None
+    st.session_state.setdefault(SESSION_KEYS.FINANCIAL_GOALS, [])
+    st.session_state.setdefault(SESSION_KEYS.CURRENT_GOAL_ID, None)
+    st.session_state.setdefault(SESSION_KEYS.CURRENT_GOAL_NAME, None)
         
     # Price alerts state
-    if SESSION_KEYS.PRICE_ALERTS not in st.session_state:
-        st.session_state[SESSION_KEYS.PRICE_ALERTS] = []
-        
-    if SESSION_KEYS.CURRENT_ALERT_ID not in st.session_state:
-        st.session_state[SESSION_KEYS.CURRENT_ALERT_ID] = None
+    st.session_state.setdefault(SESSION_KEYS.PRICE_ALERTS, [])
+    st.session_state.setdefault(SESSION_KEYS.CURRENT_ALERT_ID, None)
         
     # AI recommendations state
-    if SESSION_KEYS.AI_RECOMMENDATIONS not in st.session_state:
-        st.session_state[SESSION_KEYS.AI_RECOMMENDATIONS] = None
-        
-    if SESSION_KEYS.PORTFOLIO_SWOT not in st.session_state:
-        st.session_state[SESSION_KEYS.PORTFOLIO_SWOT] = None
+    st.session_state.setdefault(SESSION_KEYS.AI_RECOMMENDATIONS, None)
+    st.session_state.setdefault(SESSION_KEYS.PORTFOLIO_SWOT, None)
         
     # Tax optimization state
-    if SESSION_KEYS.TAX_OPTIMIZATION not in st.session_state:
-        st.session_state[SESSION_KEYS.TAX_OPTIMIZATION] = None
+    st.session_state.setdefault(SESSION_KEYS.TAX_OPTIMIZATION, None)
         
     # Advanced analytics state
-    if SESSION_KEYS.PORTFOLIO_PERFORMANCE_PREDICTION not in st.session_state:
-        st.session_state[SESSION_KEYS.PORTFOLIO_PERFORMANCE_PREDICTION] = None
-        
-    if SESSION_KEYS.SECTOR_ANALYSIS not in st.session_state:
-        st.session_state[SESSION_KEYS.SECTOR_ANALYSIS] = None
-        
-    if SESSION_KEYS.ECONOMIC_SCENARIO_ANALYSIS not in st.session_state:
-        st.session_state[SESSION_KEYS.ECONOMIC_SCENARIO_ANALYSIS] = None
-        
-    if SESSION_KEYS.AI_PORTFOLIO_INSIGHTS not in st.session_state:
-        st.session_state[SESSION_KEYS.AI_PORTFOLIO_INSIGHTS] = None
-        
-    if SESSION_KEYS.MPT_METRICS not in st.session_state:
-        st.session_state[SESSION_KEYS.MPT_METRICS] = None
+    st.session_state.setdefault(SESSION_KEYS.PORTFOLIO_PERFORMANCE_PREDICTION, None)
+    st.session_state.setdefault(SESSION_KEYS.SECTOR_ANALYSIS, None)
+    st.session_state.setdefault(SESSION_KEYS.ECONOMIC_SCENARIO_ANALYSIS, None)
+    st.session_state.setdefault(SESSION_KEYS.AI_PORTFOLIO_INSIGHTS, None)
+    st.session_state.setdefault(SESSION_KEYS.MPT_METRICS, None)
+
+# Recommended allocation percentages by risk profile. Built once at import and shared
+# by every caller, so treat the returned dicts as read-only
+_RISK_PROFILE_ALLOCATIONS = {
+    "Low Risk (Conservative)": {
+        "Large Cap": 40,
+        "Mid Cap": 25,
+        "Small Cap": 20,
+        "Gold": 10,
+        "ETFs/Crypto": 5
+    },
+    "Medium Risk (Balanced)": {
+        "Large Cap": 30,
+        "Mid Cap": 30,
+        "Small Cap": 25,
+        "Gold": 10,
+        "ETFs/Crypto": 5
+    },
+    "High Risk (Aggressive)": {
+        "Large Cap": 25,
+        "Mid Cap": 25,
+        "Small Cap": 35,
+        "ETFs/Crypto": 10,
+        "Gold": 5
+    }
+}
+
+_ASSET_CATEGORY_COLORS = {
+    "Large Cap": "#1f77b4",
+    "Mid Cap": "#ff7f0e",
+    "Small Cap": "#2ca02c",
+    "Gold": "#d62728",
+    "ETFs/Crypto": "#9467bd",
+    "Other": "#8c564b"
+}
 
 def get_risk_profile_allocation(risk_profile):
     """
@@ -148,49 +159,33 @@ def get_risk_profile_allocation(risk_profile):
         risk_profile (str): Selected risk profile
         
     Returns:
-        dict: Recommended allocation percentages by category
+        dict: Recommended allocation percentages by category (shared, do not modify)
     """
-    allocations = {
-        "Low Risk (Conservative)": {
-            "Large Cap": 40,
-            "Mid Cap": 25,
-            "Small Cap": 20,
-            "Gold": 10,
-            "ETFs/Crypto": 5
-        },
-        "Medium Risk (Balanced)": {
-            "Large Cap": 30,
-            "Mid Cap": 30,
-            "Small Cap": 25,
-            "Gold": 10,
-            "ETFs/Crypto": 5
-        },
-        "High Risk (Aggressive)": {
-            "Large Cap": 25,
-            "Mid Cap": 25,
-            "Small Cap": 35,
-            "ETFs/Crypto": 10,
-            "Gold": 5
-        }
-    }
-    
-    return allocations.get(risk_profile, allocations["Medium Risk (Balanced)"])
+    return _RISK_PROFILE_ALLOCATIONS.get(risk_profile, _RISK_PROFILE_ALLOCATIONS["Medium Risk (Balanced)"])
 
 def get_asset_category_color():
     """
     Get consistent colors for asset categories for visualization.
     
     Returns:
-        dict: Color mapping for asset categories
+        dict: Color mapping for asset categories (shared, do not modify)
     """
-    return {
-        "Large Cap": "#1f77b4",
-        "Mid Cap": "#ff7f0e",
-        "Small Cap": "#2ca02c",
-        "Gold": "#d62728",
-        "ETFs/Crypto": "#9467bd",
-        "Other": "#8c564b"
-    }
+    return _ASSET_CATEGORY_COLORS
+
+def build_portfolio_frame(portfolio):
+    """
+    Build a columnar DataFrame of portfolio investments.
+    
+    Args:
+        portfolio (list): List of investment dictionaries
+        
+    Returns:
+        DataFrame: One row per investment, with 'category' as a categorical column
+            and 'amount' as float64
+    """
+    frame = pd.DataFrame(portfolio, columns=None if portfolio else ['name', 'category', 'amount', 'type'])
+    return frame.astype({'category': 'category', 'amount': 'float64'})
 
-# Import streamlit for the initialize function
+# Import streamlit and pandas for the session state helpers
+import pandas as pd
 import streamlit as st
\ No newline at end of file